@@ -0,0 +1,89 @@
+"""Time and peak memory of loading a synthetic games.csv feed into a MemoryRepository.
+
+The feed has every column of games/adapters/data/games.csv, with long descriptions and review, screenshot and
+tag blobs. "whole file" parses every row before the repository sees a game; "batches" hands each batch of
+games to the repository as it is parsed.
+
+Run from the project directory: python -m benchmarks.bench_csv_import
+"""
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from games.adapters.csv_data_importer import GameFileCSVReader
+from games.adapters.memory_repository import MemoryRepository
+
+GAME_COUNT = 20_000
+COLUMNS = ["AppID", "Name", "Release date", "Price", "About the game", "Supported languages", "Reviews",
+           "Header image", "Website", "Windows", "Mac", "Linux", "Achievements", "Recommendations", "Notes",
+           "Developers", "Publishers", "Categories", "Genres", "Tags", "Screenshots", "Movies"]
+GENRES = ["Action", "Adventure", "Casual", "Indie", "RPG", "Simulation", "Strategy", "Sports", "Racing"]
+WORDS = ["dragon", "quest", "shadow", "pixel", "galaxy", "farm", "castle", "zombie", "ninja", "station"]
+
+
+def write_feed(file_name: str, game_count: int):
+    random.seed(0)
+    with open(file_name, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMNS)
+        for i in range(game_count):
+            about = "\n".join(" ".join(random.choices(WORDS, k=40)) for _ in range(5))
+            row = {
+                "AppID": 10 + i, "Name": " ".join(random.choices(WORDS, k=3)).title(),
+                "Release date": f"Oct {i % 28 + 1}, {2000 + i % 24}", "Price": f"{i % 60}.99",
+                "About the game": about, "Supported languages": "['English', 'French', 'German']" * 5,
+                "Reviews": " ".join(random.choices(WORDS, k=150)),
+                "Header image": f"https://example.com/{i}/header.jpg", "Website": "", "Windows": "TRUE",
+                "Mac": "FALSE", "Linux": "FALSE", "Achievements": "12", "Recommendations": "0", "Notes": "",
+                "Developers": f"Developer {i % 3000}", "Publishers": f"Publisher {i % 2000}",
+                "Categories": "Single-player,Steam Achievements",
+                "Genres": ",".join(random.sample(GENRES, 2)), "Tags": ",".join(random.choices(WORDS, k=12)),
+                "Screenshots": ",".join(f"https://example.com/{i}/{n}.jpg" for n in range(12)),
+                "Movies": f"https://example.com/{i}/movie.mp4" if i % 2 else "",
+            }
+            writer.writerow([row[column] for column in COLUMNS])
+
+
+def load_whole_file(file_name: str):
+    reader = GameFileCSVReader(file_name)
+    reader.read_game_csv_file()
+    repo = MemoryRepository()
+    repo.bulk_add(reader.dataset_of_games, reader.dataset_of_genres, reader.dataset_of_publishers)
+    return repo
+
+
+def load_batches(file_name: str):
+    reader = GameFileCSVReader(file_name)
+    repo = MemoryRepository()
+    for games, genres, publishers in reader.read_game_csv_batches():
+        repo.bulk_add(games, genres, publishers)
+    return repo
+
+
+def measure(load, file_name: str) -> tuple:
+    start = time.perf_counter()
+    load(file_name)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    repo = load(file_name)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, retained, peak, repo.get_number_of_games()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'games.csv')
+        write_feed(file_name, GAME_COUNT)
+        print(f"{GAME_COUNT} games, {os.path.getsize(file_name) / 1e6:.0f} MB feed")
+        for name, load in (("whole file", load_whole_file), ("batches", load_batches)):
+            seconds, retained, peak, games = measure(load, file_name)
+            print(f"{name:>10}: {seconds:6.2f} s, {games} games, "
+                  f"retained {retained / 1e6:6.1f} MB, peak {peak / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
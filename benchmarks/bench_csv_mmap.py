@@ -0,0 +1,61 @@
+"""Memory a parallel-import worker needs to read its piece of a synthetic games.csv feed.
+
+"read piece" copies the piece out of the file and decodes it in one go, as the workers did before; "mmap"
+is _read_game_chunk, which decodes one line at a time from a memory-mapped file. The games themselves are
+kept either way, so the reading overhead is the peak Python allocation less what is still held afterwards.
+
+Run from the project directory: python -m benchmarks.bench_csv_mmap
+"""
+import csv
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_csv_import import write_feed
+from games.adapters.csv_data_importer import GAME_COLUMNS, _game_from_row, _read_game_chunk, record_boundaries
+
+GAME_COUNT = 20_000
+
+
+def read_piece(game_filename, start: int, end: int, columns: list) -> tuple:
+    with open(game_filename, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode('utf-8')
+    games, genres, publishers = [], [], []
+    genres_by_name, publishers_by_name = dict(), dict()
+    for row in csv.reader(io.StringIO(text, newline=None)):
+        if row:
+            game = _game_from_row(row, columns, genres_by_name, publishers_by_name, genres, publishers)
+            if game is not None:
+                games.append(game)
+    return games, genres, publishers
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'games.csv')
+        write_feed(file_name, GAME_COUNT)
+        size = os.path.getsize(file_name)
+        with open(file_name, encoding='utf-8') as file:
+            header = next(csv.reader(file))
+        columns = [header.index(column) for column in GAME_COLUMNS]
+        # the whole feed as one piece, as a worker of a multi-GB feed would see a large piece
+        start = record_boundaries(file_name, [1])[0]
+        print(f"{GAME_COUNT} games, {size / 1e6:.0f} MB piece")
+
+        for name, read in (("read piece", read_piece), ("mmap", _read_game_chunk)):
+            begin = time.perf_counter()
+            read(file_name, start, size, columns)
+            seconds = time.perf_counter() - begin
+            tracemalloc.start()
+            games = read(file_name, start, size, columns)
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{name:>10}: {seconds:5.2f} s, {len(games[0])} games, "
+                  f"reading overhead {(peak - retained) / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Time parsing a synthetic games.csv feed with GameFileCSVReader across 1 to 8 worker processes.
+
+Speed-up needs that many cores; with fewer, the extra processes only add the cost of sending games back.
+
+Run from the project directory: python -m benchmarks.bench_csv_parallel
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.bench_csv_import import write_feed
+from games.adapters.csv_data_importer import GameFileCSVReader
+
+GAME_COUNT = 40_000
+PROCESS_COUNTS = [1, 2, 4, 8]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'games.csv')
+        write_feed(file_name, GAME_COUNT)
+        print(f"{GAME_COUNT} games, {os.path.getsize(file_name) / 1e6:.0f} MB feed, {os.cpu_count()} cores")
+        baseline = None
+        for processes in PROCESS_COUNTS:
+            reader = GameFileCSVReader(file_name)
+            start = time.perf_counter()
+            reader.read_game_csv_file(processes=processes)
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+            print(f"{processes:>3} processes: {seconds:6.2f} s, {baseline / seconds:4.1f}x, "
+                  f"{reader.get_unique_games_count()} games")
+
+
+if __name__ == "__main__":
+    main()
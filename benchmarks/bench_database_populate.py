@@ -0,0 +1,86 @@
+"""Time loading a synthetic catalogue into a fresh SQLite file through SqlAlchemyRepository.
+
+"one bulk_add" loads every game in one call; "bulk_add per batch" calls bulk_add for each 1000 games, as populate
+did before bulk_add_batches; "bulk_add_batches" streams the same 1000-game batches through one call, as populate
+does now. "populate" runs populate in database mode on a games.csv feed of the same games.
+
+Run from the project directory: python -m benchmarks.bench_database_populate
+"""
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, clear_mappers
+
+from benchmarks.bench_csv_import import write_feed
+from games.adapters.database_repository import SqlAlchemyRepository
+from games.adapters.orm import metadata, map_model_to_tables
+from games.adapters.repository_populate import populate
+from games.domainmodel.model import Game, Genre, Publisher
+
+GAME_COUNTS = [10_000, 100_000]
+BATCH_SIZE = 1000
+
+
+def make_games(game_count: int, genres: list, publishers: list) -> list:
+    games = []
+    for i in range(game_count):
+        game = Game(i, f"Game {i}")
+        game.release_date = f"Oct {i % 28 + 1}, {2000 + i % 24}"
+        game.price = 9.99
+        game.description = "A game. " * 40
+        game.image_url = f"https://example.com/{i}.jpg"
+        game.publisher = publishers[i % len(publishers)]
+        game.add_genre(genres[i % len(genres)])
+        game.add_genre(genres[(i * 7) % len(genres)])
+        games.append(game)
+    return games
+
+
+def batches(games: list, genres: list, publishers: list) -> list:
+    return [(games[start:start + BATCH_SIZE], genres if start == 0 else [], publishers if start == 0 else [])
+            for start in range(0, len(games), BATCH_SIZE)]
+
+
+def bulk_add_per_batch(repo: SqlAlchemyRepository, game_batches: list):
+    for games, genres, publishers in game_batches:
+        repo.bulk_add(games, genres, publishers)
+
+
+def timed(directory: str, load) -> tuple:
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'games.db')}")
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    repo = SqlAlchemyRepository(sessionmaker(bind=engine))
+    start = time.perf_counter()
+    load(repo)
+    seconds = time.perf_counter() - start
+    rows = repo.get_number_of_games()
+    engine.dispose()
+    return seconds, rows
+
+
+def main():
+    clear_mappers()
+    map_model_to_tables()
+    # objects of mapped classes have to be made after map_model_to_tables
+    genres = [Genre(f"Genre {i}") for i in range(30)]
+    publishers = [Publisher(f"Publisher {i}") for i in range(5_000)]
+    for game_count in GAME_COUNTS:
+        games = make_games(game_count, genres, publishers)
+        game_batches = batches(games, genres, publishers)
+        with tempfile.TemporaryDirectory() as directory:
+            write_feed(os.path.join(directory, 'games.csv'), game_count)
+            print(f"{game_count} games")
+            for name, load in (
+                    ("one bulk_add", lambda repo: repo.bulk_add(games, genres, publishers)),
+                    ("bulk_add per batch", lambda repo: bulk_add_per_batch(repo, game_batches)),
+                    ("bulk_add_batches", lambda repo: repo.bulk_add_batches(iter(game_batches))),
+                    ("populate", lambda repo: populate(directory, repo, database_mode=True))):
+                seconds, rows = timed(directory, load)
+                print(f"{name:>20}: {seconds:6.2f} s ({rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
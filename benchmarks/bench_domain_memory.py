@@ -0,0 +1,105 @@
+"""Bytes per Game, Genre, Publisher, User and Review object, as built by their constructors and as loaded
+from a pickle such as the catalogue snapshot, with and without __slots__.
+
+The classes without __slots__ are copies of the domain classes built with type() from the same methods, so
+their attributes go into a per-object __dict__ as they did before the classes declared slots. Attribute
+values are shared between the built objects where the model allows it, so the built columns are mostly the
+objects themselves and their attribute storage; unpickled objects also hold their own copy of each string.
+
+Run from the project directory: python -m benchmarks.bench_domain_memory
+"""
+import pickle
+import tracemalloc
+import types
+
+from games.domainmodel.model import Game, Genre, Publisher, Review, User
+
+OBJECT_COUNT = 100_000
+GENRE = Genre("Action")
+PUBLISHER = Publisher("Publisher")
+USER = User("reviewer", "Passw0rd")
+GAME = Game(1, "Game")
+NAMES = [f"name {i}" for i in range(OBJECT_COUNT)]
+
+
+class Observer:
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+OBSERVER = Observer()
+
+
+def game_state(self):
+    # how games were pickled before they had slots: their __dict__ without observers or a description loader
+    state = self.__dict__.copy()
+    state.pop('_Game__observers', None)
+    if state.pop('_Game__description_loader', None) is not None:
+        state['_Game__description'] = self.description
+    return state
+
+
+def without_slots(cls):
+    # the class's methods and properties on a class of its own with no __slots__ and no slot descriptors
+    namespace = {name: value for name, value in vars(cls).items()
+                 if name not in ('__slots__', '__dict__', '__weakref__')
+                 and not isinstance(value, types.MemberDescriptorType)}
+    name = f"{cls.__name__}WithoutSlots"
+    namespace.update(__module__=__name__, __qualname__=name)
+    if cls is Game:
+        namespace['__getstate__'] = game_state
+    # pickle finds classes by module and name
+    globals()[name] = type(name, (), namespace)
+    return globals()[name]
+
+
+def make_game(cls, i: int):
+    game = cls(i, NAMES[i])
+    game.release_date = "Oct 21, 2008"
+    game.price = 9.99
+    game.description = NAMES[i]
+    game.image_url = NAMES[i]
+    game.trailer_url = NAMES[i]
+    game.publisher = PUBLISHER
+    game.add_genre(GENRE)
+    # a MemoryRepository observes every game it holds
+    game.add_observer(OBSERVER)
+    return game
+
+
+FACTORIES = {
+    Game: make_game,
+    Genre: lambda cls, i: cls(NAMES[i]),
+    Publisher: lambda cls, i: cls(NAMES[i]),
+    User: lambda cls, i: cls(NAMES[i], "Passw0rd"),
+    Review: lambda cls, i: cls(USER, GAME, 5, NAMES[i], "2023-09-09 15:56:42.405482"),
+}
+
+
+def bytes_per_object(make) -> float:
+    tracemalloc.start()
+    objects = make()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # less the list holding them
+    return allocated / len(objects) - 8
+
+
+def measure(cls, factory) -> tuple:
+    built = bytes_per_object(lambda: [factory(cls, i) for i in range(OBJECT_COUNT)])
+    data = pickle.dumps([factory(cls, i) for i in range(OBJECT_COUNT)], pickle.HIGHEST_PROTOCOL)
+    unpickled = bytes_per_object(lambda: pickle.loads(data))
+    return built, unpickled
+
+
+def main():
+    print(f"{'':>10} {'without __slots__':>20} {'with __slots__':>20}   bytes per object")
+    print(f"{'class':>10} {'built':>9} {'unpickled':>10} {'built':>9} {'unpickled':>10}")
+    for cls, factory in FACTORIES.items():
+        before = measure(without_slots(cls), factory)
+        after = measure(cls, factory)
+        print(f"{cls.__name__:>10} {before[0]:>9.0f} {before[1]:>10.0f} {after[0]:>9.0f} {after[1]:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Memory held by a MemoryRepository loaded from a synthetic games.csv feed, with descriptions kept in memory
+against descriptions kept in a DescriptionStore, and the time to read a description back.
+
+Run from the project directory: python -m benchmarks.bench_lazy_descriptions
+"""
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_csv_import import write_feed
+from games.adapters.csv_data_importer import GameFileCSVReader
+from games.adapters.description_store import DescriptionStore
+from games.adapters.memory_repository import MemoryRepository
+
+GAME_COUNT = 20_000
+READS = 10_000
+
+
+def load(file_name: str, descriptions: DescriptionStore | None) -> MemoryRepository:
+    repo = MemoryRepository(descriptions)
+    for games, genres, publishers in GameFileCSVReader(file_name).read_game_csv_batches():
+        repo.bulk_add(games, genres, publishers)
+    return repo
+
+
+def main():
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'games.csv')
+        write_feed(file_name, GAME_COUNT)
+        print(f"{GAME_COUNT} games")
+        for name in ("in memory", "store"):
+            descriptions = DescriptionStore() if name == "store" else None
+            tracemalloc.start()
+            repo = load(file_name, descriptions)
+            retained, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            games = repo.get_all_games()
+            # info pages mostly show the same popular games, so reads favour a few hundred of them
+            popular = random.sample(games, 200)
+            picks = [random.choice(popular) if random.random() < 0.9 else random.choice(games) for _ in range(READS)]
+            start = time.perf_counter()
+            for game in picks:
+                game.description
+            seconds = time.perf_counter() - start
+            stored = f", {descriptions.size / 1e6:.1f} MB on disk" if descriptions is not None else ""
+            print(f"{name:>10}: {retained / 1e6:6.1f} MB in memory{stored}, "
+                  f"{seconds / READS * 1e6:5.1f} us per description read")
+            if descriptions is not None:
+                descriptions.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Requests per second served in database mode for each engine pool class.
+
+NullPool opens and closes a new SQLite connection for every request, which is what create_app did before
+the pool became configurable.
+
+Run from the project directory: python -m benchmarks.bench_request_throughput
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.orm import clear_mappers
+
+from games import create_app
+
+POOL_CLASSES = ['NullPool', 'QueuePool', 'SingletonThreadPool']
+# routes backed by the paged repository queries, so the per-request connection cost is not drowned out
+URLS = ['/all_games', '/all_games/3', '/info/7940', '/search/?query=war&filter=title']
+ROUNDS = 200
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = f"sqlite:///{os.path.join(directory, 'games.db')}"
+        for pool_class in POOL_CLASSES:
+            app = create_app({
+                'TESTING': 'True',
+                'REPOSITORY': 'database',
+                'SQLALCHEMY_DATABASE_URI': database_uri,
+                'SQLALCHEMY_ECHO': False,
+                'SQLALCHEMY_POOL_CLASS': pool_class,
+                'TEST_DATA_PATH': Path('games') / 'adapters' / 'data',
+                'WTF_CSRF_ENABLED': False
+            })
+            client = app.test_client()
+            for url in URLS:
+                client.get(url)
+
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                for url in URLS:
+                    client.get(url)
+            seconds = time.perf_counter() - start
+
+            print(f"{pool_class:>20}: {ROUNDS * len(URLS) / seconds:8.1f} requests/s")
+            clear_mappers()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Time rendering /all_games with a cold and a warm sidebar fragment cache.
+
+The catalogue is padded with extra publishers, since their sidebar list is the largest loop in the page.
+
+Run from the project directory: python -m benchmarks.bench_sidebar_render
+"""
+import timeit
+from pathlib import Path
+
+from games import create_app
+import games.adapters.repository as repo
+from games.domainmodel.model import Publisher
+from games.sidebar.services import sidebar_cache
+
+EXTRA_PUBLISHERS = 20_000
+REQUESTS = 50
+
+
+def main():
+    app = create_app({
+        'TESTING': True,
+        'REPOSITORY': 'memory',
+        'TEST_DATA_PATH': Path('games') / 'adapters' / 'data',
+        'WTF_CSRF_ENABLED': False
+    })
+    for i in range(EXTRA_PUBLISHERS):
+        repo.repo_instance.add_publisher(Publisher(f"Publisher {i:05d}"))
+    publisher_count = len(repo.repo_instance.get_all_publishers())
+    client = app.test_client()
+
+    def cold():
+        # what every request paid before the cache: rebuild the urls and re-run the template loops
+        sidebar_cache.clear()
+        client.get('/all_games')
+
+    def warm():
+        client.get('/all_games')
+
+    print(f"/all_games with {publisher_count} publishers, {REQUESTS} requests each")
+    for name, request in (("cold sidebar", cold), ("cached sidebar", warm)):
+        seconds = timeit.timeit(request, number=REQUESTS) / REQUESTS
+        print(f"{name:>15}: {seconds * 1000:8.2f} ms per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Time create_app in memory mode, parsing games.csv against loading the catalogue snapshot.
+
+The data files are copied to a temporary directory, so the snapshot is written there and not next to the real
+games.csv.
+
+Run from the project directory: python -m benchmarks.bench_startup
+"""
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from games import create_app
+
+DATA_PATH = Path('games') / 'adapters' / 'data'
+ROUNDS = 5
+
+
+def start(data_path: Path, snapshot: bool) -> float:
+    begin = time.perf_counter()
+    create_app({
+        'TESTING': 'True',
+        'REPOSITORY': 'memory',
+        'TEST_DATA_PATH': data_path,
+        'CATALOGUE_SNAPSHOT': snapshot,
+        'WTF_CSRF_ENABLED': False
+    })
+    return time.perf_counter() - begin
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = Path(directory)
+        for file_name in ('games.csv', 'users.csv'):
+            shutil.copy(DATA_PATH / file_name, data_path / file_name)
+
+        parse = min(start(data_path, False) for _ in range(ROUNDS))
+        first = start(data_path, True)
+        load = min(start(data_path, True) for _ in range(ROUNDS))
+        snapshot_size = (data_path / 'games.snapshot').stat().st_size
+
+        print(f"{'parse games.csv':>24}: {parse * 1000:8.1f} ms")
+        print(f"{'parse and write snapshot':>24}: {first * 1000:8.1f} ms")
+        print(f"{'load snapshot':>24}: {load * 1000:8.1f} ms ({snapshot_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Latency percentiles of MemoryRepository.get_suggestions on a large synthetic catalogue.
+
+Prefixes of 1 to 6 characters are taken from random titles. A review is added before every tenth lookup,
+so the cached results for common prefixes have to be kept up to date.
+
+Run from the project directory: python -m benchmarks.bench_suggest
+"""
+import random
+import time
+from datetime import datetime
+
+from games.adapters.memory_repository import MemoryRepository
+from games.domainmodel.model import Game, Genre, Publisher, Review, User
+
+GAME_COUNT = 300_000
+PUBLISHER_COUNT = 20_000
+SYLLABLES = ["ka", "ro", "mi", "zen", "tor", "al", "vek", "lu", "dra", "gon", "sha", "dow", "qu", "est", "pi", "rat",
+             "nin", "ja", "sta", "tion", "cas", "tle", "fa", "rm", "zo", "mbi", "el", "ven", "gar", "dia"]
+LOOKUPS = 20_000
+
+
+def word() -> str:
+    return "".join(random.sample(SYLLABLES, random.randint(2, 3))).capitalize()
+
+
+def main():
+    random.seed(0)
+    repo = MemoryRepository()
+    genres = [Genre(word()) for _ in range(50)]
+    publishers = [Publisher(f"{word()} {word()}") for _ in range(PUBLISHER_COUNT)]
+    games = []
+    start = time.perf_counter()
+    for i in range(GAME_COUNT):
+        game = Game(i, " ".join(word() for _ in range(random.randint(2, 4))))
+        game.publisher = random.choice(publishers)
+        game.add_genre(random.choice(genres))
+        games.append(game)
+    repo.bulk_add(games, genres, publishers)
+    repo.get_suggestions("a", 8)
+    print(f"{GAME_COUNT} games, {PUBLISHER_COUNT} publishers: index built in {time.perf_counter() - start:.1f} s")
+
+    user = User("reviewer", "Passw0rd")
+    timings = []
+    for i in range(LOOKUPS):
+        if i % 10 == 0:
+            game = random.choice(games)
+            repo.add_review(Review(user, game, 5, f"Review {i}", str(datetime.now())))
+        title = random.choice(games).title
+        prefix = title[:random.randint(1, 6)]
+        start = time.perf_counter()
+        repo.get_suggestions(prefix, 8)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    for percentile in (50, 90, 99, 99.9):
+        print(f"p{percentile:<5} {timings[int(len(timings) * percentile / 100)] * 1000:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
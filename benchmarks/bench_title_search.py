@@ -0,0 +1,44 @@
+"""Time MemoryRepository title search against a scan of every title, on a large synthetic catalogue.
+
+Run from the project directory: python -m benchmarks.bench_title_search
+"""
+import random
+import timeit
+
+from games.adapters.memory_repository import MemoryRepository
+from games.domainmodel.model import Game
+
+GAME_COUNT = 300_000
+SYLLABLES = ["ka", "ro", "mi", "zen", "tor", "al", "vek", "lu", "dra", "gon", "sha", "dow", "qu", "est", "pi", "rat",
+             "nin", "ja", "sta", "tion", "cas", "tle", "fa", "rm", "zo", "mbi", "el", "ven", "gar", "dia"]
+REPEATS = 20
+
+
+def build_repo() -> tuple:
+    random.seed(0)
+    vocabulary = sorted({"".join(random.sample(SYLLABLES, random.randint(2, 3))).capitalize() for _ in range(20_000)})
+    repo = MemoryRepository()
+    titles = []
+    for i in range(GAME_COUNT):
+        titles.append(" ".join(random.sample(vocabulary, random.randint(2, 4))) + f" {i % 10}")
+        repo.add_game(Game(i, titles[-1]))
+    # whole words, word fragments, a phrase from a title, and a miss
+    queries = [vocabulary[100], vocabulary[5000][1:5], titles[1234][:12], "Dragon", "nja", "xyzzy"]
+    return repo, queries
+
+
+def main():
+    repo, queries = build_repo()
+    games = repo.get_all_games()
+    print(f"{GAME_COUNT} games, ms per search")
+    print(f"{'query':>20} {'results':>8} {'scan':>8} {'index':>8}")
+    for query in queries:
+        scan = timeit.timeit(lambda: [game for game in games if query.lower() in game.title.lower()],
+                             number=REPEATS) / REPEATS
+        index = timeit.timeit(lambda: repo.search_games_by_title(query), number=REPEATS) / REPEATS
+        results = len(repo.search_games_by_title(query))
+        print(f"{query:>20} {results:>8} {scan * 1000:>8.2f} {index * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
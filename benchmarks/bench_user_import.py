@@ -0,0 +1,51 @@
+"""Time GameFileCSVReader.read_user_csv_file on synthetic user files of up to 100k users.
+
+Each user has three reviews and two favourites of games from games/adapters/data/games.csv.
+
+Run from the project directory: python -m benchmarks.bench_user_import
+"""
+import csv
+import os
+import random
+import tempfile
+import time
+
+from games.adapters.csv_data_importer import GameFileCSVReader
+
+GAMES_FILE_NAME = os.path.join('games', 'adapters', 'data', 'games.csv')
+USER_COUNTS = [1_000, 10_000, 100_000]
+
+
+def write_users(file_name: str, user_count: int, games: list):
+    random.seed(0)
+    with open(file_name, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Username', 'Password', 'Reviews', 'Favourites'])
+        for i in range(user_count):
+            reviews = '|'.join(f"{game.game_id}, {game.title.replace(',', '').replace('|', '')}, "
+                               f"{random.randint(1, 5)}, review {i}, 2023-09-09 15:56:42.405482"
+                               for game in random.sample(games, 3))
+            favourites = '|'.join(str(game.game_id) for game in random.sample(games, 2))
+            writer.writerow([f"user{i}", "pbkdf2:sha256:600000$salt$hash", reviews, favourites])
+
+
+def main():
+    reader = GameFileCSVReader(GAMES_FILE_NAME)
+    reader.read_game_csv_file()
+    games = reader.dataset_of_games
+    print(f"{len(games)} games")
+    with tempfile.TemporaryDirectory() as directory:
+        for user_count in USER_COUNTS:
+            users_file_name = os.path.join(directory, f"users{user_count}.csv")
+            write_users(users_file_name, user_count, games)
+            reader = GameFileCSVReader(GAMES_FILE_NAME, users_file_name)
+            reader.read_game_csv_file()
+
+            start = time.perf_counter()
+            reader.read_user_csv_file()
+            seconds = time.perf_counter() - start
+            print(f"{user_count:>8} users: {seconds:6.2f} s ({seconds / user_count * 1e6:5.1f} us per user)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Time MemoryRepository.get_user as the number of stored users grows.
+
+Run from the project directory: python -m benchmarks.bench_user_lookup
+"""
+import random
+import timeit
+
+from games.adapters.memory_repository import MemoryRepository
+from games.domainmodel.model import User
+
+USER_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+LOOKUPS = 10_000
+
+
+def build_repo(user_count: int) -> MemoryRepository:
+    repo = MemoryRepository()
+    # zero-padded names arrive in sorted order, so insort_left appends instead of shifting the list
+    for i in range(user_count):
+        repo.add_user(User(f"user{i:07d}", "Passw0rd"))
+    return repo
+
+
+def main():
+    print(f"{'users':>10} {'ns per get_user':>16}")
+    for user_count in USER_COUNTS:
+        repo = build_repo(user_count)
+        names = [f"USER{random.randrange(user_count):07d}" for _ in range(LOOKUPS)]
+        seconds = timeit.timeit(lambda: [repo.get_user(name) for name in names], number=5) / 5
+        print(f"{user_count:>10} {seconds / LOOKUPS * 1e9:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import json
 from os import environ
 from dotenv import load_dotenv
 
@@ -17,10 +18,50 @@ class Config:
 
     REPOSITORY = environ.get('REPOSITORY')
 
+    # Memory mode keeps the parsed catalogue in a games.snapshot file next to games.csv, and loads it instead of
+    # parsing the CSV file again while the CSV file is unchanged. Off by default, since it writes into the data
+    # directory, which may be part of a read-only install.
+    CATALOGUE_SNAPSHOT = environ.get('CATALOGUE_SNAPSHOT', 'False').lower().strip() == "true"
+
+    # Memory mode keeps game descriptions in a temporary file rather than in memory, and caches the most
+    # recently shown DESCRIPTION_CACHE_SIZE of them
+    LAZY_DESCRIPTIONS = environ.get('LAZY_DESCRIPTIONS', 'False').lower().strip() == "true"
+    DESCRIPTION_CACHE_SIZE = int(environ.get('DESCRIPTION_CACHE_SIZE', 256))
+
+    # Worker processes parsing games.csv; files of a few MB or less are always parsed in one process
+    CSV_IMPORT_PROCESSES = int(environ.get('CSV_IMPORT_PROCESSES', 1))
+
     # Database configuration
     SQLALCHEMY_DATABASE_URI = environ.get('SQLALCHEMY_DATABASE_URI')
 
     echo_string = environ.get('SQLALCHEMY_ECHO')
     SQLALCHEMY_ECHO = False
     if echo_string.lower().strip() == "true":
-        SQLALCHEMY_ECHO = True
\ No newline at end of file
+        SQLALCHEMY_ECHO = True
+
+    # Connection pool for the database engine: QueuePool, SingletonThreadPool, StaticPool or NullPool.
+    # In-memory SQLite databases always use a SingletonThreadPool, since each connection is a new database.
+    SQLALCHEMY_POOL_CLASS = environ.get('SQLALCHEMY_POOL_CLASS', 'QueuePool')
+    SQLALCHEMY_POOL_SIZE = int(environ.get('SQLALCHEMY_POOL_SIZE', 5))
+    SQLALCHEMY_MAX_OVERFLOW = int(environ.get('SQLALCHEMY_MAX_OVERFLOW', 10))
+
+    # SQLite pragmas applied to every new connection. WAL journaling lets readers carry on while a review is
+    # written; NORMAL synchronous is safe with WAL. cache_size is in KiB when negative, mmap_size in bytes.
+    SQLITE_JOURNAL_MODE = environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE = int(environ.get('SQLITE_CACHE_SIZE', -64000))
+    SQLITE_MMAP_SIZE = int(environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_TEMP_STORE = environ.get('SQLITE_TEMP_STORE', 'MEMORY')
+    SQLITE_BUSY_TIMEOUT = int(environ.get('SQLITE_BUSY_TIMEOUT', 5000))
+
+    # Search through an SQLite FTS5 index, where this SQLite build has FTS5, instead of ILIKE scans
+    SQLALCHEMY_FULL_TEXT_SEARCH = environ.get('SQLALCHEMY_FULL_TEXT_SEARCH', 'True').lower().strip() == "true"
+
+    # Relationship loading per kind of game query ('listing' or 'detail'), as JSON such as
+    # {"listing": {"publisher": "joined", "genres": "subquery"}}. Each kind given replaces its default in
+    # LOADER_STRATEGIES (games/adapters/database_repository.py); strategies are joined, selectin, subquery,
+    # lazy or raise.
+    SQLALCHEMY_LOADER_STRATEGIES = json.loads(environ.get('SQLALCHEMY_LOADER_STRATEGIES') or 'null')
+
+    # Count the SQL statements each request runs and report them in an X-SQL-Statement-Count header
+    SQLALCHEMY_RECORD_QUERIES = environ.get('SQLALCHEMY_RECORD_QUERIES', 'False').lower().strip() == "true"
@@ -1,16 +1,47 @@
 """Initialize Flask app."""
 
-from flask import Flask, session
+from flask import Flask, g, has_request_context, session
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, clear_mappers
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, QueuePool, SingletonThreadPool, StaticPool
 
 import games.adapters.repository as repo
 import games.adapters.memory_repository as memory_repo
 import games.adapters.database_repository as database
 from games.adapters import repository_populate
-from games.adapters.orm import map_model_to_tables, metadata
+from games.adapters.description_store import DescriptionStore
+from games.adapters.orm import create_full_text_search, map_model_to_tables, metadata, migrate_schema
+
+
+POOL_CLASSES = {pool_class.__name__: pool_class for pool_class in (NullPool, QueuePool, SingletonThreadPool, StaticPool)}
+
+
+def engine_options(config) -> dict:
+    pool_name = config.get('SQLALCHEMY_POOL_CLASS', 'QueuePool')
+    if config['SQLALCHEMY_DATABASE_URI'] in ('sqlite://', 'sqlite:///:memory:') and pool_name != 'StaticPool':
+        pool_name = 'SingletonThreadPool'
+    options = {'connect_args': {"check_same_thread": False}, 'poolclass': POOL_CLASSES[pool_name]}
+    if pool_name in ('QueuePool', 'SingletonThreadPool'):
+        options['pool_size'] = config.get('SQLALCHEMY_POOL_SIZE', 5)
+    if pool_name == 'QueuePool':
+        options['max_overflow'] = config.get('SQLALCHEMY_MAX_OVERFLOW', 10)
+    return options
+
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'SQLITE_JOURNAL_MODE',
+    'synchronous': 'SQLITE_SYNCHRONOUS',
+    'cache_size': 'SQLITE_CACHE_SIZE',
+    'mmap_size': 'SQLITE_MMAP_SIZE',
+    'temp_store': 'SQLITE_TEMP_STORE',
+    'busy_timeout': 'SQLITE_BUSY_TIMEOUT',
+}
+
+
+def sqlite_pragmas(config) -> dict:
+    # pragmas left unset (None) in the config keep SQLite's defaults
+    return {pragma: config[key] for pragma, key in SQLITE_PRAGMAS.items() if config.get(key) is not None}
 
 
 def create_app(test_config=None):
@@ -26,16 +57,41 @@ def create_app(test_config=None):
         data_path = app.config['TEST_DATA_PATH']
 
     if app.config['REPOSITORY'] == 'memory':
-        repo.repo_instance = memory_repo.MemoryRepository()
-        repository_populate.populate(data_path, repo.repo_instance, False)
+        descriptions = None
+        if app.config.get('LAZY_DESCRIPTIONS'):
+            descriptions = DescriptionStore(cache_size=app.config.get('DESCRIPTION_CACHE_SIZE', 256))
+        repo.repo_instance = memory_repo.MemoryRepository(descriptions)
+        repository_populate.populate(data_path, repo.repo_instance, False, app.config.get('CATALOGUE_SNAPSHOT', False),
+                                     app.config.get('CSV_IMPORT_PROCESSES', 1))
 
     elif app.config['REPOSITORY'] == 'database':
         database_uri = app.config['SQLALCHEMY_DATABASE_URI']
         database_echo = app.config['SQLALCHEMY_ECHO']
-        database_engine = create_engine(database_uri, connect_args={"check_same_thread": False}, poolclass=NullPool,
-                                        echo=database_echo)
+        database_engine = create_engine(database_uri, echo=database_echo, **engine_options(app.config))
+
+        if database_engine.dialect.name == 'sqlite':
+            pragmas = sqlite_pragmas(app.config)
+
+            @event.listens_for(database_engine, 'connect')
+            def set_sqlite_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                for pragma, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {pragma} = {value}")
+                cursor.close()
         session_factory = sessionmaker(autocommit=False, autoflush=True, bind=database_engine)
-        repo.repo_instance = database.SqlAlchemyRepository(session_factory)
+        repo.repo_instance = database.SqlAlchemyRepository(session_factory,
+                                                           app.config.get('SQLALCHEMY_LOADER_STRATEGIES'))
+
+        if app.config.get('SQLALCHEMY_RECORD_QUERIES'):
+            @event.listens_for(database_engine, 'before_cursor_execute')
+            def count_sql_statement(*args):
+                if has_request_context():
+                    g.sql_statement_count = g.get('sql_statement_count', 0) + 1
+
+            @app.after_request
+            def add_sql_statement_count(response):
+                response.headers['X-SQL-Statement-Count'] = str(g.get('sql_statement_count', 0))
+                return response
 
         if app.config['TESTING'] == 'True' or len(database_engine.table_names()) == 0:
             print("REPOPULATING DATABASE...")
@@ -48,12 +104,18 @@ def create_app(test_config=None):
                 connection.execute(table.delete())
         
             map_model_to_tables()
-            repository_populate.populate(data_path, repo.repo_instance, True)
+            repository_populate.populate(data_path, repo.repo_instance, True,
+                                         processes=app.config.get('CSV_IMPORT_PROCESSES', 1))
             print("REPOPULATING DATABASE... FINISHED")
 
         else:
+            migrate_schema(database_engine)
             map_model_to_tables()
 
+        if app.config.get('SQLALCHEMY_FULL_TEXT_SEARCH') and database_engine.dialect.name == 'sqlite':
+            with database_engine.begin() as connection:
+                create_full_text_search(connection)
+
     first_request = True
 
     @app.before_request
@@ -1,54 +1,281 @@
 import csv
+import hashlib
+import io
+import mmap
 import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 from games.domainmodel.model import Genre, Game, Publisher, User, Review
 
 
+# bump when the pickled domain classes change shape, so older snapshots are re-parsed from the CSV file
+SNAPSHOT_VERSION = 2
+
+# the columns of the game file that a Game is built from; the language, review, screenshot and tag blobs are not
+GAME_COLUMNS = ("AppID", "Name", "Release date", "Price", "About the game", "Header image", "Movies",
+                "Screenshots", "Publishers", "Genres")
+
+
+def _game_from_row(row: list, columns: list, genres_by_name: dict, publishers_by_name: dict,
+                   new_genres: list, new_publishers: list) -> Game | None:
+    # columns are the positions of GAME_COLUMNS in the row. Genres and publishers not yet in the by_name dicts
+    # are added to them and to new_genres and new_publishers. Returns None for a row that cannot be read.
+    (id_column, title_column, release_date_column, price_column, description_column, image_column,
+     movies_column, screenshots_column, publisher_column, genres_column) = columns
+    try:
+        game = Game(int(row[id_column]), row[title_column])
+        game.release_date = row[release_date_column]
+        game.price = float(row[price_column])
+        game.description = row[description_column]
+        game.image_url = row[image_column]
+        if row[movies_column]:
+            game.trailer_url = row[movies_column].split(',')[0]
+        else:
+            game.trailer_url = row[screenshots_column].split(',')[0]
+
+        publisher_name = row[publisher_column].strip()
+        publisher = publishers_by_name.get(publisher_name)
+        if publisher is None:
+            publisher = publishers_by_name[publisher_name] = Publisher(publisher_name)
+            new_publishers.append(publisher)
+        game.publisher = publisher
+
+        for genre_name in row[genres_column].split(","):
+            genre_name = genre_name.strip()
+            genre = genres_by_name.get(genre_name)
+            if genre is None:
+                genre = genres_by_name[genre_name] = Genre(genre_name)
+                new_genres.append(genre)
+            game.add_genre(genre)
+        return game
+
+    except ValueError as e:
+        print(f"Skipping row due to invalid data: {e}")
+    except IndexError as e:
+        print(f"Skipping row due to missing field: {e}")
+    return None
+
+
+def _mapped_lines(mapped: mmap.mmap, start: int, end: int):
+    # Lines of mapped[start:end], decoded one at a time, with newlines translated as for a file opened in text
+    # mode. Only the current line is copied out of the map; the rest stays in the page cache.
+    position = start
+    while position < end:
+        newline = mapped.find(b'\n', position, end)
+        stop = end if newline < 0 else newline + 1
+        line = mapped[position:stop].decode('utf-8')
+        if '\r' in line:
+            line = line.replace('\r\n', '\n').replace('\r', '\n')
+        yield line
+        position = stop
+
+
+def _read_game_chunk(game_filename, start: int, end: int, columns: list) -> tuple:
+    # Runs in a worker process: parses the whole records between two byte offsets of the game file into games,
+    # and the genres and publishers they use. The file is memory-mapped, so workers share its pages in the OS
+    # page cache instead of each reading a private copy of their piece.
+    games, genres, publishers = [], [], []
+    genres_by_name, publishers_by_name = dict(), dict()
+    with open(game_filename, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for row in csv.reader(_mapped_lines(mapped, start, end)):
+            if row:
+                game = _game_from_row(row, columns, genres_by_name, publishers_by_name, genres, publishers)
+                if game is not None:
+                    games.append(game)
+    return games, genres, publishers
+
+
+def record_boundaries(game_filename, offsets: list) -> list:
+    # For each of the ascending byte offsets, the offset of the first record of the CSV file that starts after
+    # it: just past a newline that is outside quotes, so a multi-line quoted description is never split.
+    # Quotes are counted from the start of the file, since "" inside a quoted field leaves the parity as it was.
+    boundaries = []
+    size = os.path.getsize(game_filename)
+    if size == 0:
+        return [0 for _ in offsets]
+    with open(game_filename, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        position, quoted = 0, False
+        for offset in offsets:
+            if boundaries and offset <= position:
+                # already at the start of a record
+                boundaries.append(position)
+                continue
+            for block_start in range(position, min(offset, size), 1 << 20):
+                quoted ^= mapped[block_start:min(block_start + (1 << 20), offset)].count(b'"') % 2 == 1
+            position = max(position, min(offset, size))
+            while position < size:
+                newline = mapped.find(b'\n', position)
+                if newline < 0:
+                    position = size
+                    break
+                quoted ^= mapped[position:newline].count(b'"') % 2 == 1
+                position = newline + 1
+                if not quoted:
+                    break
+            boundaries.append(position)
+    return boundaries
+
+
 class GameFileCSVReader:
     def __init__(self, game_filename, user_filename = ""):
         self.__game_filename = game_filename
         self.__dataset_of_games = []
+        # reviews and favourites in the user file refer to games by id
+        self.__games_by_id = dict()
         self.__dataset_of_publishers = set()
         self.__dataset_of_genres = set()
         self.__user_filename = user_filename
         self.__dataset_of_users = set()
 
-    def read_game_csv_file(self):
+    # parallel reads give each worker at least this many bytes of the game file
+    MIN_CHUNK_BYTES = 1 << 20
+
+    def read_game_csv_file(self, processes: int = 1):
+        for _ in self.read_game_csv_batches(processes=processes):
+            pass
+
+    def read_game_csv_batches(self, batch_size: int = 1000, processes: int = 1, keep: bool = True):
+        # Generator of (games, genres, publishers) for each batch_size rows of the game file, where genres and
+        # publishers are the ones first seen in that batch, so a repository can take each batch while the rest
+        # of the file is still being parsed. Games with the same genre or publisher share one object.
+        # With processes > 1 a large file is split on record boundaries and the pieces are parsed in a process
+        # pool; the batches are then one piece each, in file order.
+        # With keep=False the batches are not added to the datasets, so a caller that needs neither the users
+        # nor a snapshot lets each batch be freed once the repository has taken it.
         if not os.path.exists(self.__game_filename):
             print(f"path {self.__game_filename} does not exist!")
             return
+        size = os.path.getsize(self.__game_filename)
+        if processes > 1 and size >= 2 * self.MIN_CHUNK_BYTES:
+            yield from self.__read_game_chunks(processes, keep)
+            return
+
+        genres_by_name = dict()
+        publishers_by_name = dict()
+        games, genres, publishers = [], [], []
         with open(self.__game_filename, 'r', encoding='utf-8-sig') as file:
-            reader = csv.DictReader(file)
+            reader = csv.reader(file)
+            columns = self.__game_columns(next(reader, []))
+            if columns is None:
+                return
+
             for row in reader:
-                try:
-                    game_id = int(row["AppID"])
-                    title = row["Name"]
-                    game = Game(game_id, title)
-                    game.release_date = row["Release date"]
-                    game.price = float(row["Price"])
-                    game.description = row["About the game"]
-                    game.image_url = row["Header image"]
-                    if row["Movies"]:
-                        game.trailer_url = row["Movies"].split(',')[0]
-                    else:
-                        game.trailer_url = row["Screenshots"].split(',')[0]
-
-                    publisher = Publisher(row["Publishers"])
-                    self.__dataset_of_publishers.add(publisher)
-                    game.publisher = publisher
-
-                    genre_names = row["Genres"].split(",")
-                    for genre_name in genre_names:
-                        genre = Genre(genre_name.strip())
-                        self.__dataset_of_genres.add(genre)
-                        game.add_genre(genre)
-
-                    self.__dataset_of_games.append(game)
+                if not row:
+                    continue
+                game = _game_from_row(row, columns, genres_by_name, publishers_by_name, genres, publishers)
+                if game is not None:
+                    games.append(game)
+                if len(games) >= batch_size:
+                    if keep:
+                        self.__add_to_datasets(games, genres, publishers)
+                    yield games, genres, publishers
+                    games, genres, publishers = [], [], []
 
-                except ValueError as e:
-                    print(f"Skipping row due to invalid data: {e}")
-                except KeyError as e:
-                    print(f"Skipping row due to missing key: {e}")
+        if games or genres or publishers:
+            if keep:
+                self.__add_to_datasets(games, genres, publishers)
+            yield games, genres, publishers
+
+    @staticmethod
+    def __game_columns(header: list) -> list | None:
+        try:
+            return [header.index(column) for column in GAME_COLUMNS]
+        except ValueError as e:
+            print(f"Skipping file due to missing column: {e}")
+            return None
+
+    def __add_to_datasets(self, games: list, genres: list, publishers: list):
+        self.__dataset_of_games.extend(games)
+        for game in games:
+            self.__games_by_id.setdefault(game.game_id, game)
+        self.__dataset_of_genres.update(genres)
+        self.__dataset_of_publishers.update(publishers)
+
+    def __read_game_chunks(self, processes: int, keep: bool):
+        size = os.path.getsize(self.__game_filename)
+        # a few pieces per process, so one slow piece does not leave the other processes idle at the end
+        chunk_count = max(1, min(processes * 4, size // self.MIN_CHUNK_BYTES))
+        boundaries = record_boundaries(self.__game_filename,
+                                       [1] + [size * i // chunk_count for i in range(1, chunk_count)])
+        with open(self.__game_filename, 'rb') as file:
+            header = file.read(boundaries[0]).decode('utf-8-sig')
+        columns = self.__game_columns(next(csv.reader(io.StringIO(header, newline=None)), []))
+        if columns is None:
+            return
+        chunks = [(start, end) for start, end in zip(boundaries, boundaries[1:] + [size]) if start < end]
+
+        # each piece has its own genre and publisher objects; swap them for the first ones seen with that name
+        genres_by_name = dict()
+        publishers_by_name = dict()
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for games, genres, publishers in executor.map(_read_game_chunk, repeat(self.__game_filename),
+                                                          *zip(*chunks), repeat(columns)):
+                genres = [genres_by_name.setdefault(genre.genre_name, genre) for genre in genres
+                          if genre.genre_name not in genres_by_name]
+                publishers = [publishers_by_name.setdefault(publisher.publisher_name, publisher)
+                              for publisher in publishers if publisher.publisher_name not in publishers_by_name]
+                for game in games:
+                    game.publisher = publishers_by_name[game.publisher.publisher_name]
+                    game.genres[:] = [genres_by_name[genre.genre_name] for genre in game.genres]
+                if keep:
+                    self.__add_to_datasets(games, genres, publishers)
+                yield games, genres, publishers
+
+    def __game_file_hash(self) -> str:
+        digest = hashlib.sha256()
+        with open(self.__game_filename, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def read_game_snapshot(self, snapshot_filename) -> bool:
+        # Loads the games, genres and publishers pickled by write_game_snapshot, if the snapshot was taken from
+        # the current game file. Returns False when read_game_csv_file is needed instead.
+        if not os.path.exists(snapshot_filename) or not os.path.exists(self.__game_filename):
+            return False
+        stat = os.stat(self.__game_filename)
+        try:
+            with open(snapshot_filename, 'rb') as file:
+                key = pickle.load(file)
+                if key.get('version') != SNAPSHOT_VERSION or key.get('size') != stat.st_size:
+                    return False
+                # the hash is only checked when the mtime moved, so a file that was touched or checked out again
+                # with the same contents still matches
+                touched = key.get('mtime_ns') != stat.st_mtime_ns
+                if touched and key.get('sha256') != self.__game_file_hash():
+                    return False
+                games, genres, publishers = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError, ValueError) as e:
+            print(f"Ignoring unreadable snapshot {snapshot_filename}: {e}")
+            return False
+        self.__dataset_of_games = games
+        self.__games_by_id = dict()
+        for game in reversed(games):
+            self.__games_by_id[game.game_id] = game
+        self.__dataset_of_genres = genres
+        self.__dataset_of_publishers = publishers
+        if touched:
+            self.write_game_snapshot(snapshot_filename)
+        return True
+
+    def write_game_snapshot(self, snapshot_filename):
+        stat = os.stat(self.__game_filename)
+        key = {'version': SNAPSHOT_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+               'sha256': self.__game_file_hash()}
+        # written to a temporary file and renamed into place, so a crash never leaves half a snapshot behind
+        temporary_filename = f"{snapshot_filename}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_filename, 'wb') as file:
+                pickle.dump(key, file, pickle.HIGHEST_PROTOCOL)
+                pickle.dump((self.__dataset_of_games, self.__dataset_of_genres, self.__dataset_of_publishers),
+                            file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_filename, snapshot_filename)
+        except (OSError, pickle.PicklingError) as e:
+            print(f"Could not write snapshot {snapshot_filename}: {e}")
+            if os.path.exists(temporary_filename):
+                os.remove(temporary_filename)
 
     def get_unique_games_count(self):
         return len(self.__dataset_of_games)
@@ -87,14 +314,14 @@ class GameFileCSVReader:
                     if review_data[0] != '':
                         for review in review_data:
                             components = review.split(',')
-                            game = next(game for game in self.__dataset_of_games if game.game_id == int(components[0]))
+                            game = self.__games_by_id[int(components[0])]
                             review = Review(user, game, int(components[2]), components[3], components[4])
                             user.add_review(review)
 
                     favourites_data = (row["Favourites"]).split('|')
                     if favourites_data[0] != '':
                         for fav in favourites_data:
-                            game = next(game for game in self.__dataset_of_games if game.game_id == int(fav))
+                            game = self.__games_by_id[int(fav)]
                             user.add_favourite_game(game)
 
                     self.__dataset_of_users.add(user)
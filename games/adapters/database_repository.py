@@ -1,14 +1,48 @@
-from datetime import datetime
+from datetime import date
 from typing import List
 
-from sqlalchemy import collate
+from sqlalchemy import collate, exists, func, or_, select, text
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import scoped_session
+from sqlalchemy.orm import joinedload, lazyload, raiseload, scoped_session, selectinload, subqueryload
 
+from games.adapters.orm import (
+    version_counters_table, games_table, genres_table, publishers_table, game_genres_table, games_fts_table,
+    reviews_table, has_full_text_search
+)
 from games.adapters.repository import AbstractRepository
+from games.adapters.suggestion_index import SuggestionIndex
 from games.domainmodel.model import Game, Genre, Publisher, User, Review
 
 
+# Relationship loading per kind of game query, as {'relationship.path': strategy}. Listing pages show
+# cards for many games, the detail page shows one game with its reviews, reviewers and recommendations.
+LOADER_STRATEGIES = {
+    'listing': {'publisher': 'joined', 'genres': 'selectin'},
+    'detail': {'publisher': 'joined', 'genres': 'selectin', 'reviews': 'selectin', 'reviews.user': 'joined',
+               'recommended_games': 'selectin'},
+}
+
+LOADERS = {'joined': joinedload, 'selectin': selectinload, 'subquery': subqueryload, 'lazy': lazyload,
+           'raise': raiseload}
+
+
+def loader_options(strategies: dict) -> list:
+    # relationships are mapped onto the name-mangled attributes, e.g. 'reviews.user' is
+    # Game._Game__reviews followed by Review._Review__user
+    options = []
+    for path, strategy in strategies.items():
+        names = path.split('.')
+        option, cls = None, Game
+        for depth, name in enumerate(names):
+            hop_strategy = strategies.get('.'.join(names[:depth + 1]), 'lazy')
+            loader = LOADERS[hop_strategy]
+            attribute = getattr(cls, f"_{cls.__name__}__{name}")
+            option = loader(attribute) if option is None else getattr(option, loader.__name__)(attribute)
+            cls = attribute.property.mapper.class_
+        options.append(option)
+    return options
+
+
 class SessionContextManager:
     def __init__(self, session_factory):
         self.__session_factory = session_factory
@@ -31,8 +65,9 @@ class SessionContextManager:
         self.__session.rollback()
 
     def reset_session(self):
-        self.close_current_session()
-        self.__session = scoped_session(self.__session_factory)
+        # discard this thread's session and return its connection to the pool; the registry is kept
+        # and hands the thread a fresh session on next use
+        self.__session.remove()
 
     def close_current_session(self):
         if self.__session is not None:
@@ -41,8 +76,13 @@ class SessionContextManager:
 
 class SqlAlchemyRepository(AbstractRepository):
 
-    def __init__(self, session_factory):
+    def __init__(self, session_factory, loader_strategies: dict = None):
         self._session_cm = SessionContextManager(session_factory)
+        self.__loader_strategies = {**LOADER_STRATEGIES, **(loader_strategies or {})}
+        self.__full_text_search = None
+        # (suggestions counter, index) built from the database on the first suggestion lookup, then kept up to
+        # date by the writes of this repository and rebuilt when the counter shows any other write
+        self.__suggestions = None
 
     def close_session(self):
         self._session_cm.close_current_session()
@@ -51,58 +91,139 @@ class SqlAlchemyRepository(AbstractRepository):
         self._session_cm.reset_session()
 
     def add_game(self, game: Game):
-        if isinstance(game, Game) and game not in self.get_all_games():
-            with self._session_cm as scm:
-                scm.session.merge(game)
-                scm.commit()
+        if isinstance(game, Game) and not self.__exists(Game._Game__game_id == game.game_id):
+            self.__merge_and_commit(game, lambda suggestions: suggestions.set_title(game.game_id, game.title))
 
     def add_publisher(self, publisher: Publisher):
-        if isinstance(publisher, Publisher) and publisher not in self.get_all_publishers():
-            with self._session_cm as scm:
-                scm.session.merge(publisher)
-                scm.commit()
+        if isinstance(publisher, Publisher) and \
+                not self.__exists(Publisher._Publisher__publisher_name == publisher.publisher_name):
+            self.__merge_and_commit(
+                publisher, lambda suggestions: suggestions.add_name('publisher', publisher.publisher_name))
 
     def add_genre(self, genre: Genre):
-        if isinstance(genre, Genre) and genre not in self.get_all_genres():
-            with self._session_cm as scm:
-                scm.session.merge(genre)
-                scm.commit()
+        if isinstance(genre, Genre) and not self.__exists(Genre._Genre__genre_name == genre.genre_name):
+            self.__merge_and_commit(genre, lambda suggestions: suggestions.add_name('genre', genre.genre_name))
+
+    def __merge_and_commit(self, obj, update_suggestions):
+        # A suggestion index built at the counter read before this write takes the write in place and moves on
+        # to the counter read after it, in the same transaction. One that missed a write, such as one made by
+        # another process, is left behind and rebuilt on the next lookup.
+        suggestions = self.__suggestions
+        with self._session_cm as scm:
+            current = suggestions is not None and suggestions[0] == self.__suggestions_version()
+            scm.session.merge(obj)
+            if current:
+                scm.session.flush()
+                version = self.__suggestions_version()
+            scm.commit()
+        if current:
+            update_suggestions(suggestions[1])
+            self.__suggestions = (version, suggestions[1])
+
+    def __exists(self, criterion) -> bool:
+        # a keyed EXISTS lookup on a primary key or unique column, rather than loading the whole table
+        return self._session_cm.session.query(exists().where(criterion)).scalar()
+
+    def bulk_add(self, games: list, genres, publishers, batch_size: int = 10000):
+        self.bulk_add_batches([(games, genres, publishers)], batch_size)
+
+    def bulk_add_batches(self, batches, batch_size: int = 10000):
+        # One transaction of batched executemany inserts through SQLAlchemy Core, bypassing the per-object
+        # merge and commit of add_game/add_genre/add_publisher. Only keys are read back, to skip existing rows,
+        # and only once: they are kept up to date as each batch goes in, so a catalogue streamed in many
+        # batches costs the same as one bulk_add.
+        with self._session_cm as scm:
+            connection = scm.session.connection()
+            existing_publishers = set(connection.execute(select(publishers_table.c.name)).scalars())
+            existing_genres = set(connection.execute(select(genres_table.c.genre_name)).scalars())
+            existing_games = set(connection.execute(select(games_table.c.game_id)).scalars())
+
+            for games, genres, publishers in batches:
+                publisher_rows = [{'name': publisher.publisher_name} for publisher in set(publishers)
+                                  if isinstance(publisher, Publisher)
+                                  and publisher.publisher_name not in existing_publishers]
+                existing_publishers.update(row['name'] for row in publisher_rows)
+                genre_rows = [{'genre_name': genre.genre_name} for genre in set(genres)
+                              if isinstance(genre, Genre) and genre.genre_name not in existing_genres]
+                existing_genres.update(row['genre_name'] for row in genre_rows)
+
+                game_rows = []
+                game_genre_rows = []
+                for game in games:
+                    if not isinstance(game, Game) or game.game_id in existing_games:
+                        continue
+                    existing_games.add(game.game_id)
+                    game_rows.append({
+                        'game_id': game.game_id,
+                        'game_title': game.title,
+                        'game_price': game.price,
+                        'release_date': game.parsed_release_date,
+                        'game_description': game.description,
+                        'game_image_url': game.image_url,
+                        'game_website_url': game.website_url,
+                        'game_trailer_url': game.trailer_url,
+                        'publisher_name': game.publisher.publisher_name if game.publisher else None,
+                        'average_rating': game.average_rating,
+                    })
+                    game_genre_rows.extend({'game_id': game.game_id, 'genre_name': genre.genre_name}
+                                           for genre in game.genres)
+
+                for table, rows in ((publishers_table, publisher_rows), (genres_table, genre_rows),
+                                    (games_table, game_rows), (game_genres_table, game_genre_rows)):
+                    for start in range(0, len(rows), batch_size):
+                        connection.execute(table.insert(), rows[start:start + batch_size])
+            scm.commit()
 
     def add_user(self, user: User):
-        if isinstance(user, User) and user not in self.get_all_users():
+        if isinstance(user, User) and not self.__exists(User._User__username == user.username):
             with self._session_cm as scm:
                 scm.session.merge(user)
                 scm.commit()
 
     def add_review(self, review: Review):
         super().add_review(review)
-        with self._session_cm as scm:
-            scm.session.merge(review)
-            scm.commit()
+        self.__merge_and_commit(review, lambda suggestions: self.__add_review_weights(suggestions, review.game))
+
+    @staticmethod
+    def __add_review_weights(suggestions: SuggestionIndex, game: Game):
+        suggestions.add_weight('title', game.game_id, 1)
+        for genre in game.genres:
+            suggestions.add_weight('genre', genre.genre_name, 1)
+        if game.publisher is not None:
+            suggestions.add_weight('publisher', game.publisher.publisher_name, 1)
 
     def get_game(self, target_id: int) -> Game | None:
         game = None
         if isinstance(target_id, int):
             try:
-                game = self._session_cm.session.query(Game).filter(Game._Game__game_id == target_id).one()
+                game = self.__games('detail').filter(Game._Game__game_id == target_id).one()
             except NoResultFound:
                 print(f'Game {target_id} was not found')
         return game
 
     def get_game_by_genre(self, target_genre: Genre) -> list:
         if isinstance(target_genre, Genre):
-            games = self._session_cm.session.query(Game).filter(
-                Game._Game__genres.any(Genre._Genre__genre_name == target_genre.genre_name)).all()
+            games = self.__with_loaders(self.__games_by_genre_query(target_genre)).all()
             return games
         return []
 
     def get_game_by_publisher(self, target_publisher: Publisher) -> list:
         if isinstance(target_publisher, Publisher):
-            games = self._session_cm.session.query(Game).filter(
-                Game._Game__publisher.has(Publisher._Publisher__publisher_name == target_publisher.publisher_name)).all()
+            games = self.__with_loaders(self.__games_by_publisher_query(target_publisher)).all()
             return games
         return []
 
+    def __games_by_genre_query(self, target_genre: Genre):
+        # an IN list read from ix_game_genres_genre_name_game_id, rather than a correlated EXISTS per game
+        genre_game_ids = select(game_genres_table.c.game_id).where(
+            game_genres_table.c.genre_name == target_genre.genre_name)
+        return self._session_cm.session.query(Game).filter(Game._Game__game_id.in_(genre_game_ids))
+
+    def __games_by_publisher_query(self, target_publisher: Publisher):
+        # compares the foreign key column directly so ix_games_publisher_name_release_date applies
+        return self._session_cm.session.query(Game).filter(
+            games_table.c.publisher_name == target_publisher.publisher_name)
+
     def get_user(self, username: str) -> User | None:
         user = None
         if isinstance(username, str):
@@ -113,14 +234,106 @@ class SqlAlchemyRepository(AbstractRepository):
         return user
 
     def sort_games_by_date(self, games: list):
-        sorted_games_date = sorted(games, key=lambda r: datetime.strptime(r.release_date, "%b %d, %Y"),
-                                   reverse=True)
+        sorted_games_date = sorted(games, key=lambda r: r.parsed_release_date, reverse=True)
         return sorted_games_date
 
     def get_all_games(self) -> list:
+        # no page renders the whole catalogue, so its relationships are left to load lazily
         games = self._session_cm.session.query(Game).all()
         return games
 
+    def get_all_games_by_date(self) -> list:
+        return self.__games('listing').order_by(*self.__date_order).all()
+
+    def get_games_page(self, offset: int, limit: int) -> list:
+        return self.__page(self._session_cm.session.query(Game), offset, limit)
+
+    def get_games_after(self, release_date: date | None, game_id: int, limit: int) -> list:
+        # keyset pagination: the range on the indexed release date lets SQLite seek straight to the cursor.
+        # Undated games sort last, so a dated page that runs short is topped up from them; they are read
+        # separately because an OR with IS NULL would turn the seek into a scan
+        release_date_column = Game._Game__parsed_release_date
+        games = []
+        undated = self.__games('listing').filter(release_date_column.is_(None))
+        if release_date is None:
+            undated = undated.filter(Game._Game__game_id > game_id)
+        else:
+            games = self.__games('listing').filter(
+                release_date_column <= release_date,
+                or_(release_date_column < release_date, Game._Game__game_id > game_id)
+            ).order_by(*self.__date_order).limit(limit).all()
+            if len(games) == limit:
+                return games
+        return games + undated.order_by(*self.__date_order).limit(limit - len(games)).all()
+
+    def get_games_released_between(self, start: date, end: date) -> list:
+        return self.__games('listing').filter(
+            Game._Game__parsed_release_date.between(start, end)).order_by(*self.__date_order).all()
+
+    def get_number_of_games(self) -> int:
+        return self._session_cm.session.query(Game).count()
+
+    def get_games_by_genre_page(self, target_genre: Genre, offset: int, limit: int) -> list:
+        if isinstance(target_genre, Genre):
+            return self.__page(self.__games_by_genre_query(target_genre), offset, limit)
+        return []
+
+    def get_number_of_games_by_genre(self, target_genre: Genre) -> int:
+        if isinstance(target_genre, Genre):
+            return self.__games_by_genre_query(target_genre).count()
+        return 0
+
+    def get_games_by_publisher_page(self, target_publisher: Publisher, offset: int, limit: int) -> list:
+        if isinstance(target_publisher, Publisher):
+            return self.__page(self.__games_by_publisher_query(target_publisher), offset, limit)
+        return []
+
+    def get_number_of_games_by_publisher(self, target_publisher: Publisher) -> int:
+        if isinstance(target_publisher, Publisher):
+            return self.__games_by_publisher_query(target_publisher).count()
+        return 0
+
+    def get_suggestions(self, prefix: str, limit: int) -> list:
+        # the counter is read before the build, so a write landing in between only costs another rebuild
+        version = self.__suggestions_version()
+        if self.__suggestions is None or self.__suggestions[0] != version:
+            self.__suggestions = (version, self.__build_suggestions())
+        return self.__suggestions[1].suggest(prefix, limit)
+
+    def __suggestions_version(self) -> int:
+        return self.__version_counters().get('suggestions', 0)
+
+    def __build_suggestions(self) -> SuggestionIndex:
+        # one pass over the names and review counts, grouped in SQL
+        suggestions = SuggestionIndex()
+        session = self._session_cm.session
+        review_counts = select(reviews_table.c.game_id, func.count().label('reviews')).group_by(
+            reviews_table.c.game_id).subquery()
+        reviews = func.coalesce(review_counts.c.reviews, 0)
+
+        games = select(games_table.c.game_id, games_table.c.game_title, reviews).outerjoin(
+            review_counts, review_counts.c.game_id == games_table.c.game_id)
+        for game_id, title, count in session.execute(games):
+            suggestions.set_title(game_id, title)
+            suggestions.add_weight('title', game_id, count)
+
+        genres = select(genres_table.c.genre_name, func.coalesce(func.sum(reviews), 0)).select_from(
+            genres_table.outerjoin(game_genres_table).outerjoin(
+                review_counts, review_counts.c.game_id == game_genres_table.c.game_id)).group_by(
+            genres_table.c.genre_name)
+        for name, count in session.execute(genres):
+            suggestions.add_name('genre', name)
+            suggestions.add_weight('genre', name, count)
+
+        publishers = select(publishers_table.c.name, func.coalesce(func.sum(reviews), 0)).select_from(
+            publishers_table.outerjoin(games_table).outerjoin(
+                review_counts, review_counts.c.game_id == games_table.c.game_id)).group_by(
+            publishers_table.c.name)
+        for name, count in session.execute(publishers):
+            suggestions.add_name('publisher', name)
+            suggestions.add_weight('publisher', name, count)
+        return suggestions
+
     def get_all_genres(self) -> list:
         genres = self._session_cm.session.query(Genre).all()
         return genres
@@ -129,33 +342,96 @@ class SqlAlchemyRepository(AbstractRepository):
         publishers = self._session_cm.session.query(Publisher).all()
         return publishers
 
+    def get_catalogue_version(self) -> int:
+        # counted by triggers in the database, so genres and publishers added by other processes move it too
+        return self.__version_counters().get('genres_and_publishers', 0)
+
+    def __version_counters(self) -> dict:
+        return dict(self._session_cm.session.execute(
+            select(version_counters_table.c.name, version_counters_table.c.version)).all())
+
     def get_all_users(self) -> list:
         users = self._session_cm.session.query(User).all()
         return users
 
     def search_games_by_title(self, search_query: str) -> list:
-        games = self._session_cm.session.query(Game).filter(
-            Game._Game__game_title.ilike(f"%{search_query}%")
-        ).all()
+        games = self.__with_loaders(self.__search_query(search_query, 'title', ranked=True)).all()
         return games
 
     def search_games_by_genre(self, search_query: str) -> list:
-        games = self._session_cm.session.query(Game).filter(
-            Game._Game__genres.any(Genre._Genre__genre_name.ilike(f"%{search_query}%"))
-        ).all()
+        games = self.__with_loaders(self.__search_query(search_query, 'genre', ranked=True)).all()
         return games
 
     def search_games_by_publisher(self, search_query: str) -> list:
-        games = self._session_cm.session.query(Game).filter(
-            Game._Game__publisher.has(Publisher._Publisher__publisher_name.ilike(f"%{search_query}%"))
-        ).all()
+        games = self.__with_loaders(self.__search_query(search_query, 'publisher', ranked=True)).all()
         return games
 
+    def search_games_page(self, search_query: str, filter_criteria: str, offset: int, limit: int) -> list:
+        query = self.__search_query(search_query, filter_criteria, ranked=True)
+        if query is None:
+            return []
+        if self.__uses_full_text_search(search_query, filter_criteria):
+            # best matches first, as ordered by __search_query
+            return self.__with_loaders(query).offset(offset).limit(limit).all()
+        return self.__page(query, offset, limit)
+
+    def get_number_of_search_results(self, search_query: str, filter_criteria: str) -> int:
+        query = self.__search_query(search_query, filter_criteria)
+        if query is None:
+            return 0
+        return query.count()
+
+    # the games_fts column searched for each filter
+    __full_text_columns = {'title': 'title', 'genre': 'genres', 'publisher': 'publisher'}
+
+    def __uses_full_text_search(self, search_query: str, filter_criteria: str) -> bool:
+        # the trigram tokenizer needs 3 characters; shorter queries take the ILIKE path
+        return filter_criteria in self.__full_text_columns and len(search_query.strip()) >= 3 \
+            and self.__has_full_text_search()
+
+    def __search_query(self, search_query: str, filter_criteria: str, ranked: bool = False):
+        # ranked full text matches are ordered by bm25 rank, best first, with ties broken by id
+        query = self._session_cm.session.query(Game)
+        if self.__uses_full_text_search(search_query, filter_criteria):
+            phrase = search_query.replace('"', '""')
+            matches = select(games_fts_table.c.rowid.label('game_id'), games_fts_table.c.rank).where(
+                text("games_fts MATCH :match").bindparams(
+                    match=f'{{{self.__full_text_columns[filter_criteria]}}} : "{phrase}"'))
+            matches = matches.subquery()
+            query = query.join(matches, matches.c.game_id == Game._Game__game_id)
+            return query.order_by(matches.c.rank, Game._Game__game_id) if ranked else query
+        if filter_criteria == 'title':
+            return query.filter(Game._Game__game_title.ilike(f"%{search_query}%"))
+        if filter_criteria == 'genre':
+            return query.filter(Game._Game__genres.any(Genre._Genre__genre_name.ilike(f"%{search_query}%")))
+        if filter_criteria == 'publisher':
+            return query.filter(
+                Game._Game__publisher.has(Publisher._Publisher__publisher_name.ilike(f"%{search_query}%")))
+        return None
+
+    def __has_full_text_search(self) -> bool:
+        # looked up once: the index is created with the schema when this SQLite build supports FTS5
+        if self.__full_text_search is None:
+            self.__full_text_search = has_full_text_search(self._session_cm.session)
+        return self.__full_text_search
+
+    def __games(self, kind: str):
+        return self.__with_loaders(self._session_cm.session.query(Game), kind)
+
+    def __with_loaders(self, query, kind: str = 'listing'):
+        # applied only where games are loaded, so the COUNT queries stay free of eager loads
+        return query.options(*loader_options(self.__loader_strategies[kind]))
+
+    # newest first with ties broken by id, the same order as sort_games_by_date on the id-ordered games
+    __date_order = (games_table.c.release_date.desc(), games_table.c.game_id)
+
+    def __page(self, query, offset: int, limit: int) -> list:
+        query = self.__with_loaders(query).order_by(*self.__date_order)
+        return query.offset(offset).limit(limit).all()
+
     def update_game(self, game: Game):
         if isinstance(game, Game):
-            with self._session_cm as scm:
-                scm.session.merge(game)
-                scm.commit()
+            self.__merge_and_commit(game, lambda suggestions: suggestions.set_title(game.game_id, game.title))
 
     def update_user(self, user: User):
         if isinstance(user, User):
@@ -0,0 +1,45 @@
+import tempfile
+import threading
+from functools import lru_cache, partial
+
+
+class DescriptionStore:
+    # Append-only file of game descriptions, so a MemoryRepository holds an offset and length per game instead of
+    # the text. Only the info page shows a description, and recently read ones are kept in an LRU cache.
+
+    def __init__(self, filename=None, cache_size: int = 256):
+        # without a filename the store is an anonymous temporary file, removed when the store is closed
+        self.__file = open(filename, 'w+b') if filename is not None else tempfile.TemporaryFile()
+        self.__size = 0
+        # the web server reads from several threads, and a read is a seek then a read on the one file
+        self.__lock = threading.Lock()
+        self.__read = lru_cache(maxsize=cache_size)(self.__read_uncached)
+
+    def add(self, text: str):
+        # stores the text and returns the loader to pass to Game.defer_description
+        data = text.encode('utf-8')
+        with self.__lock:
+            self.__file.seek(self.__size)
+            self.__file.write(data)
+            offset = self.__size
+            self.__size += len(data)
+        return partial(self.__read, offset, len(data))
+
+    def defer(self, game):
+        if game.description is not None:
+            game.defer_description(self.add(game.description))
+
+    def __read_uncached(self, offset: int, length: int) -> str:
+        with self.__lock:
+            self.__file.seek(offset)
+            return self.__file.read(length).decode('utf-8')
+
+    def cache_info(self):
+        return self.__read.cache_info()
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def close(self):
+        self.__file.close()
@@ -1,58 +1,311 @@
 from pathlib import Path
-from bisect import insort_left
-from datetime import datetime
+from bisect import bisect_left, bisect_right, insort_left
 
 from games.adapters.repository import AbstractRepository
+from games.adapters.description_store import DescriptionStore
+from games.adapters.suggestion_index import SuggestionIndex
 from games.domainmodel.model import Game, Genre, Publisher, Review, User
 
 
-class MemoryRepository(AbstractRepository):
+class GamesByDate:
+    # games ordered newest first, alongside the keys they were inserted under so that a game
+    # can still be found after its release date has changed
     def __init__(self):
+        self.__keys = list()
         self.__games = list()
+
+    @staticmethod
+    def date_key(release_date, game_id: int):
+        # ties broken by id to match a stable sort of the id-ordered game list;
+        # games without a release date go last
+        if release_date is None:
+            return 1, 0, game_id
+        return 0, -release_date.toordinal(), game_id
+
+    def add(self, game: Game):
+        key = self.date_key(game.parsed_release_date, game.game_id)
+        i = bisect_left(self.__keys, key)
+        self.__keys.insert(i, key)
+        self.__games.insert(i, game)
+
+    def remove(self, game: Game, release_date):
+        i = bisect_left(self.__keys, self.date_key(release_date, game.game_id))
+        if i < len(self.__games) and self.__games[i] is game:
+            del self.__keys[i]
+            del self.__games[i]
+
+    def after(self, release_date, game_id: int, limit: int) -> list:
+        i = bisect_right(self.__keys, self.date_key(release_date, game_id))
+        return self.__games[i:i + limit]
+
+    def between(self, start, end) -> list:
+        # the newest date comes first, so the range starts at the end date
+        first = bisect_left(self.__keys, (0, -end.toordinal()))
+        last = bisect_left(self.__keys, (0, -start.toordinal() + 1))
+        return self.__games[first:last]
+
+    @property
+    def games(self) -> list:
+        return self.__games
+
+    def __len__(self):
+        return len(self.__games)
+
+
+class TitleIndex:
+    # trigram inverted index over lower-cased titles: a query's candidates are the games holding all of
+    # its trigrams, and only those are checked for the whole substring
+    def __init__(self):
+        self.__postings = dict()
+        self.__titles = dict()
+
+    @staticmethod
+    def trigrams(text: str) -> set:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, game: Game):
+        if game.title is None:
+            return
+        title = game.title.lower()
+        self.__titles[game.game_id] = title
+        for trigram in self.trigrams(title):
+            self.__postings.setdefault(trigram, set()).add(game.game_id)
+
+    def remove(self, game: Game, title: str):
+        if title is None or self.__titles.get(game.game_id) != title.lower():
+            return
+        del self.__titles[game.game_id]
+        for trigram in self.trigrams(title.lower()):
+            postings = self.__postings[trigram]
+            postings.discard(game.game_id)
+            if not postings:
+                del self.__postings[trigram]
+
+    def search(self, search_query: str):
+        # ids of the games whose title contains the query, or None when it is too short to have a trigram
+        search_query = search_query.lower()
+        if len(search_query) < 3:
+            return None
+        postings = sorted((self.__postings.get(trigram, set()) for trigram in self.trigrams(search_query)), key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        if len(search_query) == 3:
+            return candidates
+        return {game_id for game_id in candidates if search_query in self.__titles[game_id]}
+
+
+class MemoryRepository(AbstractRepository):
+    def __init__(self, descriptions: DescriptionStore = None):
+        self.__games = list()
+        self.__games_by_id = dict()
+        self.__games_by_date = GamesByDate()
+        self.__games_by_title = TitleIndex()
+        self.__suggestions = SuggestionIndex()
+        self.__games_by_genre = dict()
+        self.__games_by_publisher = dict()
+        self.__genre_games_by_date = dict()
+        self.__publisher_games_by_date = dict()
         self.__genres = list()
         self.__publishers = list()
         self.__users = list()
+        self.__users_by_name = dict()
+        self.__catalogue_version = 0
+        # with a store, descriptions of added games are moved out of memory and read back on access
+        self.__descriptions = descriptions
 
     def add_game(self, game: Game):
-        if isinstance(game, Game) and game not in self.__games:
+        if isinstance(game, Game) and game.game_id not in self.__games_by_id:
+            if self.__descriptions is not None:
+                self.__descriptions.defer(game)
             insort_left(self.__games, game)
+            self.__games_by_id[game.game_id] = game
+            self.__games_by_date.add(game)
+            self.__games_by_title.add(game)
+            self.__suggestions.set_title(game.game_id, game.title)
+            self.__suggestions.add_weight('title', game.game_id, len(game.reviews))
+            for genre in game.genres:
+                self.genre_added(game, genre)
+            self.publisher_changed(game, None, game.publisher)
+            game.add_observer(self)
+
+    @staticmethod
+    def __insert_sorted(items: list, item) -> bool:
+        # the genre and publisher lists are sorted, so membership is a binary search rather than a scan
+        i = bisect_left(items, item)
+        if i < len(items) and items[i] == item:
+            return False
+        items.insert(i, item)
+        return True
 
     def add_genre(self, genre: Genre):
-        if isinstance(genre, Genre) and genre not in self.__genres:
-            insort_left(self.__genres, genre)
+        if isinstance(genre, Genre) and self.__insert_sorted(self.__genres, genre):
+            self.__suggestions.add_name('genre', genre.genre_name)
+            self.__catalogue_version += 1
 
     def add_publisher(self, publisher: Publisher):
-        if isinstance(publisher, Publisher) and publisher not in self.__publishers:
-            insort_left(self.__publishers, publisher)
+        if isinstance(publisher, Publisher) and self.__insert_sorted(self.__publishers, publisher):
+            self.__suggestions.add_name('publisher', publisher.publisher_name)
+            self.__catalogue_version += 1
+
+    def bulk_add(self, games: list, genres, publishers):
+        for game in games:
+            self.add_game(game)
+        for genre in genres:
+            self.add_genre(genre)
+        for publisher in publishers:
+            self.add_publisher(publisher)
 
     def get_game(self, target_id: int) -> Game | None:
-        for game in self.__games:
-            if game.game_id == target_id:
-                return game
-        return None
+        return self.__games_by_id.get(target_id)
 
     def get_game_by_genre(self, target_genre: Genre) -> list:
-        return [game for game in self.__games if target_genre in game.genres]
+        if not isinstance(target_genre, Genre):
+            return []
+        return list(self.__games_by_genre.get(target_genre.genre_name, []))
 
     def get_game_by_publisher(self, target_publisher: Publisher) -> list:
-        return [game for game in self.__games if target_publisher == game.publisher]
+        if not isinstance(target_publisher, Publisher):
+            return []
+        return list(self.__games_by_publisher.get(target_publisher.publisher_name, []))
+
+    # Game observer callbacks, keeping the posting lists and date orderings in step with the games
+    def genre_added(self, game: Game, genre: Genre):
+        insort_left(self.__games_by_genre.setdefault(genre.genre_name, []), game)
+        self.__genre_games_by_date.setdefault(genre.genre_name, GamesByDate()).add(game)
+        self.__suggestions.add_weight('genre', genre.genre_name, len(game.reviews))
+
+    def genre_removed(self, game: Game, genre: Genre):
+        self.__remove_from_index(self.__games_by_genre, genre.genre_name, game)
+        if genre.genre_name in self.__genre_games_by_date:
+            self.__genre_games_by_date[genre.genre_name].remove(game, game.parsed_release_date)
+        self.__suggestions.add_weight('genre', genre.genre_name, -len(game.reviews))
+
+    def publisher_changed(self, game: Game, old_publisher: Publisher, new_publisher: Publisher):
+        if old_publisher is not None:
+            self.__remove_from_index(self.__games_by_publisher, old_publisher.publisher_name, game)
+            if old_publisher.publisher_name in self.__publisher_games_by_date:
+                self.__publisher_games_by_date[old_publisher.publisher_name].remove(game, game.parsed_release_date)
+            self.__suggestions.add_weight('publisher', old_publisher.publisher_name, -len(game.reviews))
+        if new_publisher is not None:
+            insort_left(self.__games_by_publisher.setdefault(new_publisher.publisher_name, []), game)
+            self.__publisher_games_by_date.setdefault(new_publisher.publisher_name, GamesByDate()).add(game)
+            self.__suggestions.add_weight('publisher', new_publisher.publisher_name, len(game.reviews))
+
+    def title_changed(self, game: Game, old_title: str):
+        self.__games_by_title.remove(game, old_title)
+        self.__games_by_title.add(game)
+        self.__suggestions.set_title(game.game_id, game.title)
+
+    def review_added(self, game: Game, review: Review):
+        self.__review_count_changed(game, 1)
+
+    def review_removed(self, game: Game, review: Review):
+        self.__review_count_changed(game, -1)
+
+    def __review_count_changed(self, game: Game, delta: int):
+        self.__suggestions.add_weight('title', game.game_id, delta)
+        for genre in game.genres:
+            self.__suggestions.add_weight('genre', genre.genre_name, delta)
+        if game.publisher is not None:
+            self.__suggestions.add_weight('publisher', game.publisher.publisher_name, delta)
+
+    def release_date_changed(self, game: Game, old_release_date):
+        date_orderings = [self.__games_by_date]
+        date_orderings += [self.__genre_games_by_date[genre.genre_name] for genre in game.genres]
+        if game.publisher is not None:
+            date_orderings.append(self.__publisher_games_by_date[game.publisher.publisher_name])
+        for games_by_date in date_orderings:
+            games_by_date.remove(game, old_release_date)
+            games_by_date.add(game)
+
+    @staticmethod
+    def __remove_from_index(index: dict, key, game: Game):
+        games = index.get(key, [])
+        i = bisect_left(games, game)
+        if i < len(games) and games[i] == game:
+            del games[i]
 
     def sort_games_by_date(self, games: list):
-        sorted_games_date = sorted(games, key=lambda r: datetime.strptime(r.release_date, "%b %d, %Y"),
-                                   reverse=True)
+        sorted_games_date = sorted(games, key=lambda r: r.parsed_release_date, reverse=True)
         return sorted_games_date
 
     def get_all_games(self) -> list:
         return self.__games
 
+    def get_all_games_by_date(self) -> list:
+        return self.__games_by_date.games
+
+    def get_games_page(self, offset: int, limit: int) -> list:
+        return self.__games_by_date.games[offset:offset + limit]
+
+    def get_games_after(self, release_date, game_id: int, limit: int) -> list:
+        return self.__games_by_date.after(release_date, game_id, limit)
+
+    def get_games_released_between(self, start, end) -> list:
+        return self.__games_by_date.between(start, end)
+
+    def get_number_of_games(self) -> int:
+        return len(self.__games_by_date)
+
+    def get_games_by_genre_page(self, target_genre: Genre, offset: int, limit: int) -> list:
+        if not isinstance(target_genre, Genre) or target_genre.genre_name not in self.__genre_games_by_date:
+            return []
+        return self.__genre_games_by_date[target_genre.genre_name].games[offset:offset + limit]
+
+    def get_number_of_games_by_genre(self, target_genre: Genre) -> int:
+        if not isinstance(target_genre, Genre) or target_genre.genre_name not in self.__genre_games_by_date:
+            return 0
+        return len(self.__genre_games_by_date[target_genre.genre_name])
+
+    def get_games_by_publisher_page(self, target_publisher: Publisher, offset: int, limit: int) -> list:
+        if not isinstance(target_publisher, Publisher) \
+                or target_publisher.publisher_name not in self.__publisher_games_by_date:
+            return []
+        return self.__publisher_games_by_date[target_publisher.publisher_name].games[offset:offset + limit]
+
+    def get_number_of_games_by_publisher(self, target_publisher: Publisher) -> int:
+        if not isinstance(target_publisher, Publisher) \
+                or target_publisher.publisher_name not in self.__publisher_games_by_date:
+            return 0
+        return len(self.__publisher_games_by_date[target_publisher.publisher_name])
+
+    def search_games_page(self, search_query: str, filter_criteria: str, offset: int, limit: int) -> list:
+        return self.__search_games_by_date(search_query, filter_criteria)[offset:offset + limit]
+
+    def get_number_of_search_results(self, search_query: str, filter_criteria: str) -> int:
+        return len(self.__search_games_by_date(search_query, filter_criteria))
+
+    def __search_games_by_date(self, search_query: str, filter_criteria: str) -> list:
+        if filter_criteria == 'title':
+            game_ids = self.__games_by_title.search(search_query)
+            if game_ids is None:
+                # the catalogue is already date ordered, so filtering it keeps that order
+                return [game for game in self.__games_by_date.games if search_query.lower() in game.title.lower()]
+            games = [self.__games_by_id[game_id] for game_id in game_ids]
+        elif filter_criteria == 'genre':
+            games = self.search_games_by_genre(search_query)
+        elif filter_criteria == 'publisher':
+            games = self.search_games_by_publisher(search_query)
+        else:
+            return []
+        return sorted(games, key=lambda game: GamesByDate.date_key(game.parsed_release_date, game.game_id))
+
+    def get_suggestions(self, prefix: str, limit: int) -> list:
+        return self.__suggestions.suggest(prefix, limit)
+
     def get_all_genres(self) -> list:
         return self.__genres
 
     def get_all_publishers(self) -> list:
         return self.__publishers
 
+    def get_catalogue_version(self) -> int:
+        return self.__catalogue_version
+
     def search_games_by_title(self, search_query: str) -> list:
-        return [game for game in self.__games if search_query.lower() in game.title.lower()]
+        game_ids = self.__games_by_title.search(search_query)
+        if game_ids is None:
+            return [game for game in self.__games if search_query.lower() in game.title.lower()]
+        return [self.__games_by_id[game_id] for game_id in sorted(game_ids)]
 
     def search_games_by_genre(self, search_query: str) -> list:
         genres = [genre for genre in self.__genres if search_query.lower() in genre.genre_name.lower()]
@@ -82,16 +335,17 @@ class MemoryRepository(AbstractRepository):
             # write_review(data_path, review)
 
     def add_user(self, user: User):
-        if isinstance(user, User) and user not in self.__users:
+        if isinstance(user, User) and user.username not in self.__users_by_name:
             insort_left(self.__users, user)
+            self.__users_by_name[user.username] = user
             # data_path = Path('games') / 'adapters' / 'data'
             # write_user(data_path, user)
 
     def get_user(self, username: str) -> User | None:
-        for user in self.__users:
-            if user.username.lower() == username.lower():
-                return user
-        return None
+        # usernames are stored lower case, so a case-folded key matches them case-insensitively
+        if not isinstance(username, str):
+            return None
+        return self.__users_by_name.get(username.lower())
 
     def get_all_users(self) -> list:
         return self.__users
@@ -1,8 +1,9 @@
 from sqlalchemy import (
     Table, MetaData, Column, Integer, String, Date, DateTime, Text, Float,
-    ForeignKey
+    ForeignKey, Index, column, event, table, text
 )
-from sqlalchemy.orm import mapper, relationship, synonym
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import deferred, mapper, relationship, synonym
 
 from games.domainmodel.model import Game, Publisher, Genre, User, Review
 
@@ -23,7 +24,7 @@ games_table = Table(
     Column('game_id', Integer, primary_key=True),
     Column('game_title', Text, nullable=False),
     Column('game_price', Float, nullable=True),
-    Column('release_date', String(50), nullable=True),
+    Column('release_date', Date, nullable=True),
     Column('game_description', String(255), nullable=True),
     Column('game_image_url', String(255), nullable=True),
     Column('game_website_url', String(255), nullable=True),
@@ -32,6 +33,12 @@ games_table = Table(
     Column('average_rating', Float, nullable=True, server_default='0'),
 )
 
+# newest first, ties broken by id: the order of the game listings and of keyset (cursor) pagination
+Index('ix_games_release_date', games_table.c.release_date.desc(), games_table.c.game_id)
+# a publisher's games, already in listing order
+Index('ix_games_publisher_name_release_date',
+      games_table.c.publisher_name, games_table.c.release_date.desc(), games_table.c.game_id)
+
 game_genres_table = Table(
     'game_genres', metadata,
     Column('id', Integer, primary_key=True, autoincrement=True),
@@ -39,6 +46,10 @@ game_genres_table = Table(
     Column('genre_name', ForeignKey('genres.genre_name'))
 )
 
+# game -> genres for the relationship loads; genre -> games (covering, no table lookup) for the genre pages
+Index('ix_game_genres_game_id', game_genres_table.c.game_id)
+Index('ix_game_genres_genre_name_game_id', game_genres_table.c.genre_name, game_genres_table.c.game_id)
+
 recommended_games_table = Table(
     'recommended_games', metadata,
     Column('game_id', Integer, ForeignKey('games.game_id'), primary_key=True),
@@ -61,6 +72,9 @@ reviews_table = Table(
     Column('game_id', ForeignKey('games.game_id'))
 )
 
+Index('ix_reviews_game_id', reviews_table.c.game_id)
+Index('ix_reviews_user_name', reviews_table.c.user_name)
+
 favourites_table = Table(
     'favourites', metadata,
     Column('user_name', Integer, ForeignKey('users.user_name'), primary_key=True),
@@ -68,7 +82,138 @@ favourites_table = Table(
 )
 
 
+# Change counters for data that caches are built from, one row per kind of change, kept by triggers so that a
+# write from any process moves them. Readers compare the counter with the one they built a cache at.
+version_counters_table = Table(
+    'version_counters', metadata,
+    Column('name', String(64), primary_key=True),
+    Column('version', Integer, nullable=False)
+)
+
+# (counter, trigger event, table, condition): genres_and_publishers counts changes to the sidebar's genre and
+# publisher lists, suggestions those to the names and review counts of the search suggestion index. A game's genres
+# only weigh in through its reviews, so the genres of games without any, as a catalogue load inserts, are not counted.
+GAME_HAS_REVIEWS = "EXISTS (SELECT 1 FROM reviews WHERE game_id = {0}.game_id)"
+
+VERSION_COUNTER_EVENTS = [
+    ('genres_and_publishers', 'INSERT', 'genres', None), ('genres_and_publishers', 'DELETE', 'genres', None),
+    ('genres_and_publishers', 'INSERT', 'publishers', None), ('genres_and_publishers', 'DELETE', 'publishers', None),
+    ('suggestions', 'INSERT', 'games', None), ('suggestions', 'DELETE', 'games', None),
+    ('suggestions', 'UPDATE OF game_title, publisher_name', 'games', None),
+    ('suggestions', 'INSERT', 'game_genres', GAME_HAS_REVIEWS.format('new')),
+    ('suggestions', 'DELETE', 'game_genres', GAME_HAS_REVIEWS.format('old')),
+    ('suggestions', 'INSERT', 'genres', None), ('suggestions', 'DELETE', 'genres', None),
+    ('suggestions', 'INSERT', 'publishers', None), ('suggestions', 'DELETE', 'publishers', None),
+    ('suggestions', 'INSERT', 'reviews', None), ('suggestions', 'DELETE', 'reviews', None),
+]
+
+
+def create_version_counter_triggers(connection):
+    for counter, trigger_event, table_name, condition in VERSION_COUNTER_EVENTS:
+        trigger_name = f"{counter}_{table_name}_{trigger_event.split()[0].lower()}"
+        when = f" WHEN {condition}" if condition else ""
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {trigger_name} AFTER {trigger_event} ON {table_name}{when} BEGIN"
+            f" INSERT INTO version_counters (name, version) VALUES ('{counter}', 1)"
+            f" ON CONFLICT (name) DO UPDATE SET version = version + 1; END"))
+
+
+@event.listens_for(metadata, 'after_create')
+def _create_version_counter_triggers(target, connection, **kw):
+    # after every table exists, since the triggers are on the other tables
+    if connection.dialect.name == 'sqlite':
+        create_version_counter_triggers(connection)
+
+
+# Optional FTS5 index over the searchable text of each game, with the game id as its rowid. The trigram
+# tokenizer matches any substring of 3 or more characters, like the ILIKE '%query%' search it speeds up.
+# It is created on request (see create_app), and SQLite builds without FTS5 (or older than 3.34, without the
+# trigram tokenizer) go without it, so searches fall back to ILIKE.
+games_fts_table = table('games_fts', column('rowid'), column('rank'))
+
+GAME_GENRE_NAMES = "(SELECT group_concat(genre_name, ' | ') FROM game_genres WHERE game_id = {0}.game_id)"
+
+FULL_TEXT_SEARCH_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS games_fts_insert AFTER INSERT ON games BEGIN"
+    " INSERT INTO games_fts (rowid, title, description, publisher, genres)"
+    " VALUES (new.game_id, new.game_title, new.game_description, new.publisher_name, ''); END",
+    "CREATE TRIGGER IF NOT EXISTS games_fts_update AFTER UPDATE OF game_title, game_description, publisher_name"
+    " ON games BEGIN UPDATE games_fts SET title = new.game_title, description = new.game_description,"
+    " publisher = new.publisher_name WHERE rowid = new.game_id; END",
+    "CREATE TRIGGER IF NOT EXISTS games_fts_delete AFTER DELETE ON games BEGIN"
+    " DELETE FROM games_fts WHERE rowid = old.game_id; END",
+    "CREATE TRIGGER IF NOT EXISTS games_fts_genre_insert AFTER INSERT ON game_genres BEGIN"
+    f" UPDATE games_fts SET genres = {GAME_GENRE_NAMES.format('new')} WHERE rowid = new.game_id; END",
+    "CREATE TRIGGER IF NOT EXISTS games_fts_genre_delete AFTER DELETE ON game_genres BEGIN"
+    f" UPDATE games_fts SET genres = {GAME_GENRE_NAMES.format('old')} WHERE rowid = old.game_id; END",
+]
+
+
+def has_full_text_search(connection) -> bool:
+    return connection.execute(
+        text("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = 'games_fts'")).scalar() > 0
+
+
+def create_full_text_search(connection) -> bool:
+    # creates the index and its triggers, indexing any games already stored; returns whether it is available
+    if has_full_text_search(connection):
+        return True
+    try:
+        connection.execute(text("CREATE VIRTUAL TABLE games_fts USING fts5("
+                                "title, description, publisher, genres, tokenize = 'trigram')"))
+    except OperationalError:
+        return False
+    for trigger in FULL_TEXT_SEARCH_TRIGGERS:
+        connection.execute(text(trigger))
+    connection.execute(text("INSERT INTO games_fts (rowid, title, description, publisher, genres)"
+                            " SELECT game_id, game_title, game_description, publisher_name,"
+                            f" coalesce({GAME_GENRE_NAMES.format('games')}, '') FROM games"))
+    return True
+
+
+@event.listens_for(metadata, 'before_drop')
+def _drop_full_text_search(target, connection, **kw):
+    # its triggers go with the games table, but the index would outlive it
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text("DROP TABLE IF EXISTS games_fts"))
+
+
+# database files created before release_date became a DATE column hold 'Oct 21, 2008' text,
+# and were indexed on these expressions over it
+LEGACY_RELEASE_DATE_INDEXES = ['ix_games_release_date_order', 'ix_games_publisher_name_release_date_order']
+LEGACY_RELEASE_DATE_TO_ISO = (
+    "printf('%04d-%02d-%02d', CAST(substr(release_date, -4) AS INTEGER),"
+    " (instr('JanFebMarAprMayJunJulAugSepOctNovDec', substr(release_date, 1, 3)) + 2) / 3,"
+    " CAST(trim(substr(release_date, 5, 2), ',') AS INTEGER))")
+
+
+def migrate_schema(engine):
+    # database files from before the version counters get their table and triggers
+    version_counters_table.create(bind=engine, checkfirst=True)
+    with engine.begin() as connection:
+        create_version_counter_triggers(connection)
+        for index_name in LEGACY_RELEASE_DATE_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        # SQLAlchemy's Date type is stored by SQLite as 'YYYY-MM-DD' text
+        connection.execute(text(f"UPDATE games SET release_date = {LEGACY_RELEASE_DATE_TO_ISO} "
+                                f"WHERE release_date NOT LIKE '____-__-__'"))
+    create_missing_indexes(engine)
+
+
+def create_missing_indexes(engine):
+    # metadata.create_all skips tables that already exist, and their indexes with them, so database files
+    # created before an index was declared are given it here
+    with engine.begin() as connection:
+        existing = set(connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(bind=connection)
+
+
 def map_model_to_tables():
+    # The mapper replaces the slot descriptors of the mapped attributes, so mapped objects keep those attributes
+    # in __dict__ with their instance state. Objects of these classes have to be created after this call.
     mapper(Publisher, publishers_table, properties={
         '_Publisher__publisher_name': publishers_table.c.name,
     })
@@ -77,8 +222,9 @@ def map_model_to_tables():
         '_Game__game_id': games_table.c.game_id,
         '_Game__game_title': games_table.c.game_title,
         '_Game__price': games_table.c.game_price,
-        '_Game__release_date': games_table.c.release_date,
-        '_Game__description': games_table.c.game_description,
+        '_Game__parsed_release_date': games_table.c.release_date,
+        # only the info page shows a description, so listings leave it out of their SELECT
+        '_Game__description': deferred(games_table.c.game_description),
         '_Game__image_url': games_table.c.game_image_url,
         '_Game__website_url': games_table.c.game_website_url,
         '_Game__trailer_url': games_table.c.game_trailer_url,
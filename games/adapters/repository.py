@@ -25,6 +25,16 @@ class AbstractRepository(abc.ABC):
     def add_publisher(self, publisher: Publisher):
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def bulk_add(self, games: list, genres, publishers):
+        # loads a whole catalogue at once, skipping anything the repository already holds
+        raise NotImplementedError
+
+    def bulk_add_batches(self, batches):
+        # loads a catalogue streamed as (games, genres, publishers) batches, as bulk_add would load it whole
+        for games, genres, publishers in batches:
+            self.bulk_add(games, genres, publishers)
+
     @abc.abstractmethod
     def get_game(self, target_id: int):
         raise NotImplementedError
@@ -45,6 +55,49 @@ class AbstractRepository(abc.ABC):
     def get_all_games(self):
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_all_games_by_date(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_games_page(self, offset: int, limit: int):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_games_after(self, release_date, game_id: int, limit: int):
+        # the games after (release_date, game_id) in date order; a release_date of None is an undated game
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_games_released_between(self, start, end):
+        # games released on or between the two dates, newest first
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_number_of_games(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_games_by_genre_page(self, target_genre: Genre, offset: int, limit: int):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_number_of_games_by_genre(self, target_genre: Genre):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_games_by_publisher_page(self, target_publisher: Publisher, offset: int, limit: int):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_number_of_games_by_publisher(self, target_publisher: Publisher):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_suggestions(self, prefix: str, limit: int):
+        # up to limit titles, genres and publishers starting with prefix, most reviewed first
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_all_genres(self):
         raise NotImplementedError
@@ -53,6 +106,12 @@ class AbstractRepository(abc.ABC):
     def get_all_publishers(self):
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_catalogue_version(self):
+        # changes whenever a genre or publisher is added or removed, so derived data such as the sidebar can be
+        # cached; database mode counts in the database, so writes from other processes are seen too
+        raise NotImplementedError
+
     @abc.abstractmethod
     def search_games_by_title(self, search_query: str):
         raise NotImplementedError
@@ -65,6 +124,14 @@ class AbstractRepository(abc.ABC):
     def search_games_by_publisher(self, search_query: str):
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def search_games_page(self, search_query: str, filter_criteria: str, offset: int, limit: int):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_number_of_search_results(self, search_query: str, filter_criteria: str):
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_review(self, review: Review):
         if review.user is None or review not in review.user.reviews:
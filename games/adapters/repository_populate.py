@@ -4,23 +4,21 @@ from games.adapters.repository import AbstractRepository
 from games.adapters.csv_data_importer import GameFileCSVReader
 
 
-def populate(data_path: Path, repo: AbstractRepository, database_mode=False):
+def populate(data_path: Path, repo: AbstractRepository, database_mode=False, snapshot=False, processes=1):
     games_file_name = str(Path(data_path) / "games.csv")
     games_file_name = os.path.join(data_path, "games.csv")
     users_file_name = str(Path(data_path) / "users.csv")
+    snapshot_file_name = os.path.join(data_path, "games.snapshot")
     reader = GameFileCSVReader(games_file_name,users_file_name)
-    reader.read_game_csv_file()
-    games = reader.dataset_of_games
-    genres = reader.dataset_of_genres
-
-    for game in games:
-        repo.add_game(game)
-
-    for genre in genres:
-        repo.add_genre(genre)
-
-    for publisher in reader.dataset_of_publishers:
-        repo.add_publisher(publisher)
+    if snapshot and reader.read_game_snapshot(snapshot_file_name):
+        repo.bulk_add(reader.dataset_of_games, reader.dataset_of_genres, reader.dataset_of_publishers)
+    else:
+        # each batch of games goes into the repository while the rest of the file is parsed; the reader only
+        # keeps them for the users and the snapshot, which database mode needs neither of
+        keep = snapshot or database_mode is False
+        repo.bulk_add_batches(reader.read_game_csv_batches(processes=processes, keep=keep))
+        if snapshot:
+            reader.write_game_snapshot(snapshot_file_name)
 
     if database_mode is False:
         reader.read_user_csv_file()
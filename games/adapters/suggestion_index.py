@@ -0,0 +1,125 @@
+from bisect import bisect_left, insort_left
+from heapq import nsmallest
+from typing import NamedTuple
+
+
+class Suggestion(NamedTuple):
+    text: str
+    kind: str  # 'title', 'genre' or 'publisher'
+    game_id: int = None
+
+
+class SuggestionIndex:
+    # Sorted array of lower-cased titles, genre names and publisher names: the entries starting with a prefix
+    # are one contiguous run found by binary search, from which the most reviewed are picked. Weights are
+    # review counts, for a genre or publisher the reviews of all of its games.
+    CACHED_RUN_LENGTH = 256
+    CACHED_LIMIT = 20
+
+    def __init__(self):
+        self.__keys = list()
+        # entries added since the last lookup; loading a catalogue sorts them once instead of inserting each
+        self.__pending = list()
+        self.__weights = dict()
+        self.__titles = dict()
+        self.__names = set()
+        # for prefixes matching more than CACHED_RUN_LENGTH entries the best CACHED_LIMIT are kept, as
+        # (-weight, key) in rank order, and patched when an entry matching the prefix changes
+        self.__cache = dict()
+
+    @staticmethod
+    def __weight_key(suggestion: Suggestion):
+        if suggestion.kind == 'title':
+            return suggestion.kind, suggestion.game_id
+        return suggestion.kind, suggestion.text
+
+    def __rank(self, key: tuple) -> tuple:
+        # most reviewed first, then alphabetical
+        return -self.__weights.get(self.__weight_key(key[1]), 0), key
+
+    def __cached_prefixes(self, key: tuple):
+        return [key[0][:length] for length in range(1, len(key[0]) + 1) if key[0][:length] in self.__cache]
+
+    def __update_cache(self, key: tuple, old_rank: tuple | None, new_rank: tuple | None):
+        # old_rank is None for a new entry, new_rank is None for a deleted one
+        for prefix in self.__cached_prefixes(key):
+            ranks = self.__cache[prefix]
+            was_full = len(ranks) == self.CACHED_LIMIT
+            if old_rank is not None and old_rank in ranks:
+                ranks.remove(old_rank)
+                if was_full and (new_rank is None or new_rank > old_rank):
+                    # an entry outside the cached ranks may now belong in them
+                    del self.__cache[prefix]
+                    continue
+            if new_rank is not None:
+                insort_left(ranks, new_rank)
+                del ranks[self.CACHED_LIMIT:]
+
+    def __insert(self, key: tuple):
+        self.__pending.append(key)
+        self.__update_cache(key, None, self.__rank(key))
+
+    def __merge_pending(self):
+        if len(self.__pending) <= 32:
+            for key in self.__pending:
+                insort_left(self.__keys, key)
+        else:
+            self.__keys.extend(self.__pending)
+            self.__keys.sort()
+        self.__pending.clear()
+
+    def __delete(self, key: tuple):
+        self.__merge_pending()
+        i = bisect_left(self.__keys, key)
+        if i < len(self.__keys) and self.__keys[i] == key:
+            del self.__keys[i]
+            self.__update_cache(key, self.__rank(key), None)
+
+    def set_title(self, game_id: int, title: str):
+        old_title = self.__titles.get(game_id)
+        if old_title == title:
+            return
+        if old_title is not None:
+            self.__delete((old_title.lower(), Suggestion(old_title, 'title', game_id)))
+        if title is None:
+            self.__titles.pop(game_id, None)
+            return
+        self.__titles[game_id] = title
+        self.__insert((title.lower(), Suggestion(title, 'title', game_id)))
+
+    def add_name(self, kind: str, name: str):
+        if (kind, name) not in self.__names:
+            self.__names.add((kind, name))
+            self.__insert((name.lower(), Suggestion(name, kind)))
+
+    def add_weight(self, kind: str, key, delta: int):
+        # key is the game id for titles, or the genre or publisher name
+        if delta == 0:
+            return
+        if kind == 'title':
+            text = self.__titles.get(key)
+            entry = (text.lower(), Suggestion(text, kind, key)) if text is not None else None
+        else:
+            entry = (key.lower(), Suggestion(key, kind)) if (kind, key) in self.__names else None
+        old_rank = self.__rank(entry) if entry is not None else None
+        self.__weights[(kind, key)] = self.__weights.get((kind, key), 0) + delta
+        if entry is not None:
+            self.__update_cache(entry, old_rank, self.__rank(entry))
+
+    def suggest(self, prefix: str, limit: int) -> list:
+        prefix = prefix.lower()
+        if prefix == "" or limit <= 0:
+            return []
+        if limit <= self.CACHED_LIMIT and prefix in self.__cache:
+            return [key[1] for _, key in self.__cache[prefix][:limit]]
+        if self.__pending:
+            self.__merge_pending()
+
+        first = bisect_left(self.__keys, (prefix,))
+        last = bisect_left(self.__keys, (prefix + '\U0010ffff',))
+        cached = last - first > self.CACHED_RUN_LENGTH
+        ranks = nsmallest(max(limit, self.CACHED_LIMIT) if cached else limit,
+                          map(self.__rank, self.__keys[first:last]))
+        if cached:
+            self.__cache[prefix] = ranks[:self.CACHED_LIMIT]
+        return [key[1] for _, key in ranks[:limit]]
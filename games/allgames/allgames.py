@@ -1,8 +1,7 @@
-from flask import Blueprint, render_template, session
+from flask import Blueprint, abort, render_template, request, session
 
 import games.adapters.repository as repo
 import games.allgames.services as services
-import games.sidebar.services as sidebar_services
 
 # Configure blueprint
 allgames_blueprint = Blueprint('allgames_bp', __name__)
@@ -11,15 +10,30 @@ allgames_blueprint = Blueprint('allgames_bp', __name__)
 @allgames_blueprint.route('/all_games/<int:page>')
 @allgames_blueprint.route('/all_games', defaults={'page': 1})
 def show_all_games(page):
-    list_of_all_games = services.get_all_games(repo.repo_instance)
+    if request.args.get('after') is not None:
+        return show_all_games_after(request.args.get('after'))
 
-    total_games = len(list_of_all_games)
-    visible_games = services.pagination(16, page, list_of_all_games)
-
-    genre_urls = sidebar_services.get_genres_and_urls(repo.repo_instance)
-    publisher_urls = sidebar_services.get_publishers_and_urls(repo.repo_instance)
+    total_games = services.get_number_of_games(repo.repo_instance)
+    visible_games = services.get_games_page(repo.repo_instance, 16, page)
 
     user = session.get('user_name')
     
     return render_template('allGames.html', title="Browse All Games", list_of_games=visible_games,page=page,
-                           total_games=total_games, genre_urls=genre_urls, publisher_urls=publisher_urls, user=user)
+                           total_games=total_games, user=user)
+
+
+def show_all_games_after(cursor):
+    # keyset pagination for clients walking the whole catalogue: deep pages cost the same as the first
+    try:
+        visible_games = services.get_games_after_cursor(repo.repo_instance, 16, cursor)
+    except ValueError:
+        abort(400)
+
+    next_cursor = None
+    if len(visible_games) == 16:
+        next_cursor = services.make_cursor(visible_games[-1])
+
+    user = session.get('user_name')
+
+    return render_template('allGames.html', title="Browse All Games", list_of_games=visible_games,
+                           cursor=cursor, next_cursor=next_cursor, user=user)
@@ -1,8 +1,11 @@
+from datetime import date
+
 from games.adapters.repository import AbstractRepository
+from games.domainmodel.model import Game
 
 
 def get_all_games(repo: AbstractRepository):
-    return repo.sort_games_by_date(repo.get_all_games())
+    return repo.get_all_games_by_date()
 
 
 def pagination(games_per_page: int, page, games_list):
@@ -17,3 +20,34 @@ def pagination(games_per_page: int, page, games_list):
     visible_games = games_list[start_index:end_index]
 
     return visible_games
+
+
+def page_offset(games_per_page: int, page: int):
+    return max(page - 1, 0) * games_per_page
+
+
+def get_games_page(repo: AbstractRepository, games_per_page: int, page: int):
+    return repo.get_games_page(page_offset(games_per_page, page), games_per_page)
+
+
+def get_number_of_games(repo: AbstractRepository):
+    return repo.get_number_of_games()
+
+
+def make_cursor(game: Game):
+    # undated games come last in the date order, and their cursors say so with "none"
+    release_date = game.parsed_release_date
+    return f"{'none' if release_date is None else release_date.isoformat()}_{game.game_id}"
+
+
+def parse_cursor(cursor: str):
+    # raises ValueError for anything that make_cursor could not have produced
+    release_date, game_id = cursor.split('_')
+    return None if release_date == 'none' else date.fromisoformat(release_date), int(game_id)
+
+
+def get_games_after_cursor(repo: AbstractRepository, games_per_page: int, cursor: str):
+    if cursor == "":
+        return repo.get_games_page(0, games_per_page)
+    release_date, game_id = parse_cursor(cursor)
+    return repo.get_games_after(release_date, game_id, games_per_page)
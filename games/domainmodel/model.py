@@ -1,9 +1,17 @@
 from bisect import insort_left
-from datetime import datetime
+from datetime import date, datetime
 from typing import List
 
 
+# The domain classes use __slots__ for their attributes, which stores them in a fixed array rather than a dict
+# per object. __dict__ and __weakref__ are kept for the SQLAlchemy mapping in orm.py: mapped attributes and the
+# instance state live in __dict__, which is only created for mapped objects, and the session's identity map holds
+# weak references.
+
+
 class Publisher:
+    __slots__ = ('__publisher_name', '__dict__', '__weakref__')
+
     def __init__(self, publisher_name: str):
         if publisher_name == "" or type(publisher_name) is not str:
             self.__publisher_name = None
@@ -39,6 +47,8 @@ class Publisher:
 
 
 class Genre:
+    __slots__ = ('__genre_name', '__tagged_articles', '__dict__', '__weakref__')
+
     def __init__(self, genre_name: str):
         if genre_name == "" or type(genre_name) is not str:
             self.__genre_name = None
@@ -72,6 +82,14 @@ class Genre:
 
 
 class Game:
+    __slots__ = ('__game_id', '__game_title', '__price', '__release_date', '__parsed_release_date', '__description',
+                 '__description_loader', '__image_url', '__website_url', '__recommended_games', '__genres',
+                 '__reviews', '__average_rating', '__publisher', '__trailer_url', '__observers',
+                 '__dict__', '__weakref__')
+    # Instances loaded through the ORM skip __init__, so the slots that are not mapped (observers, the release date
+    # string, the description loader) may be unset; they are read with getattr and a default.
+    __slot_names = tuple('_Game' + name for name in __slots__ if name not in ('__dict__', '__weakref__'))
+
     def __init__(self, game_id: int, game_title: str):
         if type(game_id) is not int or game_id < 0:
             raise ValueError("Game ID should be a positive integer!")
@@ -84,7 +102,9 @@ class Game:
 
         self.__price = None
         self.__release_date = None
+        self.__parsed_release_date = None
         self.__description = None
+        self.__description_loader = None
         self.__image_url = None
         self.__website_url = None
         self.__recommended_games: list = []
@@ -93,6 +113,7 @@ class Game:
         self.__average_rating = None
         self.__publisher = None
         self.__trailer_url = None
+        self.__observers = ()
 
     @property
     def publisher(self) -> Publisher:
@@ -100,10 +121,13 @@ class Game:
 
     @publisher.setter
     def publisher(self, publisher: Publisher):
+        old_publisher = self.__publisher
         if isinstance(publisher, Publisher):
             self.__publisher = publisher
         else:
             self.__publisher = None
+        for observer in getattr(self, '_Game__observers', ()):
+            observer.publisher_changed(self, old_publisher, self.__publisher)
 
     @property
     def game_id(self):
@@ -115,10 +139,13 @@ class Game:
 
     @title.setter
     def title(self, new_title):
+        old_title = self.__game_title
         if type(new_title) is str and new_title.strip() != "":
             self.__game_title = new_title.strip()
         else:
             self.__game_title = None
+        for observer in getattr(self, '_Game__observers', ()):
+            observer.title_changed(self, old_title)
 
     @property
     def price(self):
@@ -133,31 +160,54 @@ class Game:
 
     @property
     def release_date(self):
-        return self.__release_date
+        # the database stores only the date, so rebuild the 'Oct 21, 2008' display string from it
+        release_date = getattr(self, '_Game__release_date', None)
+        parsed = getattr(self, '_Game__parsed_release_date', None)
+        if release_date is None and parsed is not None:
+            release_date = self.__release_date = f"{parsed:%b} {parsed.day}, {parsed.year}"
+        return release_date
 
     @release_date.setter
     def release_date(self, release_date: str):
         if isinstance(release_date, str):
             try:
                 # Check if the release_date string is in the correct date format (e.g., "Oct 21, 2008")
-                datetime.strptime(release_date, "%b %d, %Y")
-                self.__release_date = release_date
+                parsed_release_date = datetime.strptime(release_date, "%b %d, %Y").date()
             except ValueError:
                 raise ValueError("Release date must be in 'Oct 21, 2008' format!")
         else:
             raise ValueError("Release date must be a string in 'Oct 21, 2008' format!")
+        old_release_date = self.parsed_release_date
+        self.__release_date = release_date
+        self.__parsed_release_date = parsed_release_date
+        for observer in getattr(self, '_Game__observers', ()):
+            observer.release_date_changed(self, old_release_date)
+
+    @property
+    def parsed_release_date(self) -> date | None:
+        return getattr(self, '_Game__parsed_release_date', None)
 
     @property
     def description(self):
+        loader = getattr(self, '_Game__description_loader', None)
+        if self.__description is None and loader is not None:
+            return loader()
         return self.__description
 
     @description.setter
     def description(self, description: str):
+        self.__description_loader = None
         if isinstance(description, str) and description.strip() != "":
             self.__description = description
         else:
             self.__description = None
 
+    def defer_description(self, loader):
+        # Drops the description text from the game: loader() returns it on each access instead, e.g. from an
+        # on-disk store with its own cache
+        self.__description = None
+        self.__description_loader = loader
+
     @property
     def image_url(self):
         return self.__image_url
@@ -213,6 +263,8 @@ class Game:
         if not isinstance(genre, Genre) or genre in self.__genres:
             return
         self.__genres.append(genre)
+        for observer in getattr(self, '_Game__observers', ()):
+            observer.genre_added(self, genre)
 
     def remove_genre(self, genre: Genre):
         if not isinstance(genre, Genre):
@@ -221,17 +273,43 @@ class Game:
             self.__genres.remove(genre)
         except ValueError:
             print(f"Could not find {genre} in list of genres.")
-            pass
+            return
+        for observer in getattr(self, '_Game__observers', ()):
+            observer.genre_removed(self, genre)
+
+    def add_observer(self, observer):
+        # observers (e.g. a repository index) are told about title, genre, publisher, release date and review
+        # changes
+        observers = getattr(self, '_Game__observers', ())
+        if observer not in observers:
+            self.__observers = observers + (observer,)
+
+    def remove_observer(self, observer):
+        self.__observers = tuple(o for o in getattr(self, '_Game__observers', ()) if o is not observer)
+
+    def __getstate__(self):
+        # observers belong to this process (e.g. the repository holding the game), so they are not pickled;
+        # a deferred description is pickled as its text, so the pickle does not depend on the loader
+        slots = {name: getattr(self, name) for name in Game.__slot_names if hasattr(self, name)}
+        slots['_Game__observers'] = ()
+        if slots.get('_Game__description_loader') is not None:
+            slots['_Game__description'] = self.description
+        slots['_Game__description_loader'] = None
+        return getattr(self, '__dict__', None) or None, slots
 
     def add_review(self, review):
         if not isinstance(review, Review) or review in self.__reviews:
             return
         insort_left(self.__reviews, review)
+        for observer in getattr(self, '_Game__observers', ()):
+            observer.review_added(self, review)
 
     def remove_review(self, review):
         if not isinstance(review, Review) or review not in self.__reviews:
             return
         self.__reviews.remove(review)
+        for observer in getattr(self, '_Game__observers', ()):
+            observer.review_removed(self, review)
 
     def update_average_rating(self) -> float:
         if len(self.__reviews) == 0:
@@ -264,6 +342,8 @@ class Game:
 
 
 class User:
+    __slots__ = ('__username', '__password', '__reviews', '__favourite_games', '__dict__', '__weakref__')
+
     def __init__(self, username: str, password: str):
         if not isinstance(username, str) or username.strip() == "":
             raise ValueError('Username cannot be empty or non-string!')
@@ -332,6 +412,8 @@ class User:
 
 
 class Review:
+    __slots__ = ('__user', '__game', '__rating', '__comment', '__date', '__dict__', '__weakref__')
+
     def __init__(self, user: User, game: Game, rating: int, comment: str, date: str):
 
         if not isinstance(user, User):
@@ -3,8 +3,7 @@ from games.domainmodel.model import Genre
 
 
 def get_recently_added_games(repo: AbstractRepository, quantity: int):
-    games = repo.sort_games_by_date(repo.get_all_games())
-    recently_added = games[:quantity]
+    recently_added = repo.get_games_page(0, quantity)
     return recently_added
 
 
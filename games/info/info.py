@@ -3,7 +3,6 @@ from flask import Blueprint, render_template, session
 from games.info import services
 import games.adapters.repository as repo
 import games.profile.services as profile_services
-import games.sidebar.services as sidebar_services
 from games.reviews.reviews import ReviewForm
 
 # Configure blueprint
@@ -14,9 +13,6 @@ info_blueprint = Blueprint('info_bp', __name__)
 def get_game_info(game_id):
     game = services.get_game_by_id(repo.repo_instance, game_id)
 
-    genre_urls = sidebar_services.get_genres_and_urls(repo.repo_instance)
-    publisher_urls = sidebar_services.get_publishers_and_urls(repo.repo_instance)
-
     user = session.get('user_name')
     favourite_games = []
     form = ReviewForm()
@@ -26,8 +22,8 @@ def get_game_info(game_id):
         form.username.data = user
         form.game_id.data = game_id
 
-    return render_template('gameInfo/gameInfo.html', game=game, genre_urls=genre_urls, publisher_urls=publisher_urls,
-                           favourite_games=favourite_games, user=user, form=form)
+    return render_template('gameInfo/gameInfo.html', game=game, favourite_games=favourite_games, user=user,
+                           form=form)
 
 
 
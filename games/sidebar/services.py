@@ -1,6 +1,7 @@
 from urllib.parse import quote
 
 from games.adapters.repository import AbstractRepository
+from games.allgames.services import page_offset
 from games.domainmodel.model import Genre, Publisher
 
 
@@ -28,7 +29,107 @@ def search_by_publisher(repo: AbstractRepository, search_query: str):
         return repo.sort_games_by_date(repo.search_games_by_publisher(search_query))
 
 
+def search_page(repo: AbstractRepository, search_query: str, filter_criteria: str, games_per_page: int, page: int):
+    search_query = search_query.strip()
+    if search_query == "":
+        return []
+    else:
+        return repo.search_games_page(search_query, filter_criteria, page_offset(games_per_page, page), games_per_page)
+
+
+def get_number_of_search_results(repo: AbstractRepository, search_query: str, filter_criteria: str):
+    search_query = search_query.strip()
+    if search_query == "":
+        return 0
+    else:
+        return repo.get_number_of_search_results(search_query, filter_criteria)
+
+
+def get_suggestions(repo: AbstractRepository, search_query: str, limit: int):
+    search_query = search_query.lstrip()
+    if search_query == "":
+        return []
+    else:
+        return repo.get_suggestions(search_query, limit)
+
+
+class SidebarCache:
+    # Genre and publisher urls for the sidebar, shared by every blueprint and rebuilt only when the
+    # repository reports a new catalogue version. Each entry is a tuple tagged with the repository and
+    # version it was built for and swapped in whole, so a request that built it against an older version
+    # while another thread moved on can never leave it to be served as current.
+    def __init__(self):
+        self.__urls = None
+        self.__fragment = None
+        self.hits = 0
+        self.misses = 0
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+
+    @property
+    def version(self):
+        return None if self.__urls is None else self.__urls[1]
+
+    def __current_urls(self, repo: AbstractRepository) -> tuple:
+        version = repo.get_catalogue_version()
+        urls = self.__urls
+        if urls is not None and urls[0] is repo and urls[1] == version:
+            self.hits += 1
+        else:
+            self.misses += 1
+            urls = (repo, version, build_genre_urls(repo), build_publisher_urls(repo))
+            self.__urls = urls
+        return urls
+
+    def urls(self, repo: AbstractRepository) -> tuple:
+        _, _, genre_urls, publisher_urls = self.__current_urls(repo)
+        return genre_urls, publisher_urls
+
+    def fragment(self, repo: AbstractRepository, render) -> str:
+        # the rendered genre and publisher lists, so the template loops run once per catalogue version
+        repo, version, genre_urls, publisher_urls = self.__current_urls(repo)
+        fragment = self.__fragment
+        if fragment is not None and fragment[0] is repo and fragment[1] == version:
+            self.fragment_hits += 1
+            return fragment[2]
+        self.fragment_misses += 1
+        html = render(genre_urls, publisher_urls)
+        self.__fragment = (repo, version, html)
+        return html
+
+    def clear(self):
+        self.__urls = None
+        self.__fragment = None
+        self.hits = 0
+        self.misses = 0
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+
+
+sidebar_cache = SidebarCache()
+
+
 def get_genres_and_urls(repo: AbstractRepository):
+    genre_urls, _ = sidebar_cache.urls(repo)
+    return genre_urls
+
+
+def get_publishers_and_urls(repo: AbstractRepository):
+    _, publisher_urls = sidebar_cache.urls(repo)
+    return publisher_urls
+
+
+def get_sidebar_fragment(repo: AbstractRepository, render):
+    return sidebar_cache.fragment(repo, render)
+
+
+def get_sidebar_cache_stats():
+    return {'hits': sidebar_cache.hits, 'misses': sidebar_cache.misses,
+            'fragment_hits': sidebar_cache.fragment_hits, 'fragment_misses': sidebar_cache.fragment_misses,
+            'version': sidebar_cache.version}
+
+
+def build_genre_urls(repo: AbstractRepository):
     genres = repo.get_all_genres()
     genre_names = [genre.genre_name for genre in genres]
     genre_urls = dict()
@@ -38,7 +139,7 @@ def get_genres_and_urls(repo: AbstractRepository):
     return genre_urls
 
 
-def get_publishers_and_urls(repo: AbstractRepository):
+def build_publisher_urls(repo: AbstractRepository):
     publishers = repo.get_all_publishers()
     publisher_names = [publisher.publisher_name for publisher in publishers]
     publisher_urls = dict()
@@ -54,3 +155,20 @@ def game_by_genre(repo: AbstractRepository, target_genre: str):
 
 def game_by_publisher(repo: AbstractRepository, target_publisher: str):
     return repo.sort_games_by_date(repo.get_game_by_publisher(Publisher(target_publisher)))
+
+
+def game_by_genre_page(repo: AbstractRepository, target_genre: str, games_per_page: int, page: int):
+    return repo.get_games_by_genre_page(Genre(target_genre), page_offset(games_per_page, page), games_per_page)
+
+
+def get_number_of_games_by_genre(repo: AbstractRepository, target_genre: str):
+    return repo.get_number_of_games_by_genre(Genre(target_genre))
+
+
+def game_by_publisher_page(repo: AbstractRepository, target_publisher: str, games_per_page: int, page: int):
+    return repo.get_games_by_publisher_page(Publisher(target_publisher), page_offset(games_per_page, page),
+                                            games_per_page)
+
+
+def get_number_of_games_by_publisher(repo: AbstractRepository, target_publisher: str):
+    return repo.get_number_of_games_by_publisher(Publisher(target_publisher))
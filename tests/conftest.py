@@ -24,6 +24,7 @@ def client():
         'TESTING': True,                                # Set to True during testing.
         'REPOSITORY': 'memory',
         'TEST_DATA_PATH': TEST_DATA_PATH,               # Path for loading test data into the repository.
+        'CATALOGUE_SNAPSHOT': False,                    # Parse the test data each time rather than leave a snapshot.
         'WTF_CSRF_ENABLED': False                       # test_client will not send a CSRF token, so disable validation.
     })
     return my_app.test_client()
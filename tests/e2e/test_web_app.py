@@ -1,3 +1,5 @@
+import re
+
 import pytest
 
 from flask import session
@@ -124,6 +126,27 @@ def test_show_all_games(client):
     assert count == 3
 
 
+def test_show_all_games_with_cursor(client):
+    # Check that the first cursor page matches the first numbered page
+    response = client.get('/all_games?after=')
+    assert response.status_code == 200
+    assert response.data.count(b'<div class="game">') == 16
+    assert b"First" not in response.data
+    assert b"Next" in response.data
+
+    # Follow the next link to the last games in the catalogue
+    next_link = re.search(rb'href="([^"]*)">Next', response.data).group(1)
+    response = client.get(next_link.decode().replace('&amp;', '&'))
+    assert response.status_code == 200
+    assert response.data.count(b'<div class="game">') == 3
+    assert b"First" in response.data
+    assert b"Next" not in response.data
+
+    # Check that a malformed cursor is rejected
+    response = client.get('/all_games?after=yesterday')
+    assert response.status_code == 400
+
+
 # home blueprint
 def test_home(client):
     # Check that the home page can be retrieved
@@ -306,3 +329,32 @@ def test_games_by_publisher(client):
     assert b'Disney' in response.data
     count = response.data.count(b'<div class="game">')
     assert count == 1
+
+
+def test_sidebar_cache_stats(client):
+    # Check that rendering pages after the first reuses the cached sidebar
+    client.get('/')
+    client.get('/all_games')
+    response = client.get('/sidebar/cache_stats')
+    assert response.status_code == 200
+    assert response.json['hits'] >= 1
+    assert response.json['fragment_hits'] >= 1
+    assert response.json['version'] is not None
+
+    # Check that the cached fragment is still rendered into the sidebar
+    response = client.get('/all_games')
+    assert b'games_by_genre?genre=Action' in response.data
+
+
+def test_search_suggest(client):
+    # Check that suggestions are returned as json with links to their pages
+    response = client.get('/search/suggest?q=de')
+    assert response.status_code == 200
+    assert response.json[0] == {'text': 'Deer Journey', 'type': 'title', 'url': '/info/1995240'}
+
+    response = client.get('/search/suggest?q=act&limit=1')
+    assert response.json == [{'text': 'Action', 'type': 'genre', 'url': '/games_by_genre?genre=Action'}]
+
+    # Check that an empty query suggests nothing
+    response = client.get('/search/suggest?q=')
+    assert response.json == []
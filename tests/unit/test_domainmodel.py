@@ -1,7 +1,9 @@
-from datetime import datetime
+from datetime import date, datetime
 
 import pytest
 import os
+import pickle
+import shutil
 from games.domainmodel.model import Publisher, Genre, Game, Review, User, Wishlist
 from games.adapters.csv_data_importer import GameFileCSVReader
 
@@ -163,8 +165,10 @@ def test_game_release_date_setter():
     game = Game(1, "Super Soccer Blast")
     game.release_date = "Oct 21, 2008"
     assert game.release_date == "Oct 21, 2008"
+    assert game.parsed_release_date == date(2008, 10, 21)
     with pytest.raises(ValueError):
         game.release_date = "21/08/2008"
+    assert game.release_date == "Oct 21, 2008"
 
 
 def test_game_description_setter():
@@ -465,3 +469,131 @@ def test_genres_dataset():
     sorted_genres = sorted(genres_set)
     sorted_genre_sample = str(sorted_genres[:3])
     assert sorted_genre_sample == "[<Genre Action>, <Genre Adventure>, <Genre Animation & Modeling>]"
+
+
+def test_read_game_csv_batches_without_keeping():
+    dir_name = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    reader = GameFileCSVReader(os.path.join(dir_name, "games/adapters/data/games.csv"))
+
+    # test that every game is still handed out, but the reader holds on to none of them
+    games = [game for batch, _, _ in reader.read_game_csv_batches(batch_size=100, keep=False) for game in batch]
+    assert len(games) == 877
+    assert reader.get_unique_games_count() == 0
+    assert reader.get_unique_genres_count() == 0
+    assert reader.get_unique_publishers_count() == 0
+
+
+def test_game_snapshot(tmp_path):
+    games_file_name = tmp_path / "games.csv"
+    snapshot_file_name = tmp_path / "games.snapshot"
+    shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "games.csv"), games_file_name)
+    reader = GameFileCSVReader(str(games_file_name))
+    assert reader.read_game_snapshot(snapshot_file_name) is False
+    reader.read_game_csv_file()
+    reader.write_game_snapshot(snapshot_file_name)
+
+    snapshot_reader = GameFileCSVReader(str(games_file_name))
+    assert snapshot_reader.read_game_snapshot(snapshot_file_name) is True
+    assert snapshot_reader.dataset_of_games == reader.dataset_of_games
+    assert snapshot_reader.dataset_of_genres == reader.dataset_of_genres
+    assert snapshot_reader.dataset_of_publishers == reader.dataset_of_publishers
+    game = snapshot_reader.dataset_of_games[0]
+    original = reader.dataset_of_games[0]
+    assert (game.title, game.release_date, game.parsed_release_date, game.price, game.description) == \
+           (original.title, original.release_date, original.parsed_release_date, original.price, original.description)
+
+    # touching the file keeps the snapshot, changing it does not
+    os.utime(games_file_name, ns=(0, 0))
+    assert GameFileCSVReader(str(games_file_name)).read_game_snapshot(snapshot_file_name) is True
+    data = games_file_name.read_bytes()
+    games_file_name.write_bytes(data.replace(b"game", b"gamf", 1))
+    os.utime(games_file_name, ns=(1, 1))
+    assert GameFileCSVReader(str(games_file_name)).read_game_snapshot(snapshot_file_name) is False
+
+    snapshot_file_name.write_bytes(b"not a snapshot")
+    assert GameFileCSVReader(str(games_file_name)).read_game_snapshot(snapshot_file_name) is False
+
+
+def test_read_user_csv_file(tmp_path):
+    data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+    users_file_name = tmp_path / "users.csv"
+    shutil.copy(os.path.join(data_path, "users.csv"), users_file_name)
+    with open(users_file_name, 'a', encoding='utf-8') as file:
+        file.write('\nghost,Passw0rd,"999999999, Missing, 5, gone, 2023-09-09 15:56:42.405482",')
+    reader = GameFileCSVReader(os.path.join(data_path, "games.csv"), str(users_file_name))
+    reader.read_game_csv_file()
+    reader.read_user_csv_file()
+
+    users = {user.username: user for user in reader.dataset_of_users}
+    # the user whose review names a game that is not in the game file is skipped
+    assert set(users) == {"marklee", "oliviarodrigo"}
+    games = {game.game_id: game for game in reader.dataset_of_games}
+    review = users["oliviarodrigo"].reviews[0]
+    assert review.game is games[316260]
+    assert [game.game_id for game in users["oliviarodrigo"].favourite_games] == [410320, 730310]
+    assert all(game is games[game.game_id] for game in users["oliviarodrigo"].favourite_games)
+
+
+def test_read_game_csv_file_in_parallel(tmp_path, monkeypatch):
+    games_file_name = tmp_path / "games.csv"
+    with open(games_file_name, 'w', newline='', encoding='utf-8') as file:
+        file.write("AppID,Name,Release date,Price,About the game,Header image,Movies,Screenshots,Publishers,Genres\r\n")
+        for i in range(200):
+            # quoted descriptions with newlines and "" quotes, so a naive split at a newline would break records
+            file.write(f'{i},Game {i},"Oct {i % 28 + 1}, 2008",1.99,"Line one\r\nline ""{i}""\nline three",'
+                       f'https://example.com/{i}.jpg,,https://example.com/{i}.png,Publisher {i % 7},'
+                       f'"Action,Genre {i % 5}"\r\n')
+    serial_reader = GameFileCSVReader(str(games_file_name))
+    serial_reader.read_game_csv_file()
+    monkeypatch.setattr(GameFileCSVReader, 'MIN_CHUNK_BYTES', 1000)
+    parallel_reader = GameFileCSVReader(str(games_file_name))
+    parallel_reader.read_game_csv_file(processes=3)
+
+    assert [game.game_id for game in parallel_reader.dataset_of_games] == list(range(200))
+    for serial_game, parallel_game in zip(serial_reader.dataset_of_games, parallel_reader.dataset_of_games):
+        assert parallel_game.description == serial_game.description == \
+               f'Line one\nline "{serial_game.game_id}"\nline three'
+        assert parallel_game.release_date == serial_game.release_date
+        assert parallel_game.publisher == serial_game.publisher
+        assert parallel_game.genres == serial_game.genres
+    assert parallel_reader.dataset_of_genres == serial_reader.dataset_of_genres
+    assert parallel_reader.dataset_of_publishers == serial_reader.dataset_of_publishers
+    # games from different pieces of the file share one object per genre and publisher
+    publishers = {id(publisher) for publisher in parallel_reader.dataset_of_publishers}
+    assert len(publishers) == 7
+    assert all(id(game.publisher) in publishers for game in parallel_reader.dataset_of_games)
+
+
+def test_game_without_init():
+    # instances loaded through the ORM skip __init__, so the unmapped slots are read with defaults
+    game = Game.__new__(Game)
+    assert game.parsed_release_date is None
+    assert game.release_date is None
+    observer = object()
+    game.add_observer(observer)
+    assert game._Game__observers == (observer,)
+
+    # test that any other missing attribute is still reported by its own name
+    with pytest.raises(AttributeError, match='_Game__game_title'):
+        game.title
+
+
+def test_game_pickle(game):
+    game.release_date = "Oct 21, 2008"
+    game.publisher = Publisher("Activision")
+    game.add_genre(Genre("Action"))
+    game.defer_description(lambda: "A deferred description")
+    observer = object()
+    game.add_observer(observer)
+
+    # test that every slot survives pickling apart from the observers, and that deferred text is kept
+    loaded = pickle.loads(pickle.dumps(game))
+    assert loaded == game
+    assert loaded.title == game.title
+    assert loaded.release_date == "Oct 21, 2008"
+    assert loaded.parsed_release_date == date(2008, 10, 21)
+    assert loaded.publisher == Publisher("Activision")
+    assert loaded.genres == [Genre("Action")]
+    assert loaded.description == "A deferred description"
+    assert loaded._Game__observers == ()
+    assert game._Game__observers == (observer,)
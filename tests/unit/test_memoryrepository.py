@@ -1,13 +1,16 @@
+import pickle
 import random
 import uuid
 from collections import Counter
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
 
 import pytest
 
+from games.adapters.description_store import DescriptionStore
 from games.adapters.memory_repository import MemoryRepository
 from games.adapters.repository_populate import populate
+from games.adapters.suggestion_index import Suggestion
 from games.authentication.services import add_user
 from games.domainmodel.model import Game, Publisher, Genre, User, Review
 
@@ -133,6 +136,17 @@ def test_get_game():
     test_game = test_repo.get_game('string')
     assert test_game is None
 
+    # test that a repeated game does not replace the one already stored
+    game_repeat = Game(127, "Neo Culture Technology")
+    test_repo.add_game(game_repeat)
+    assert test_repo.get_game(127) is game1
+
+    # test that every game in a populated repo can be found by its id
+    test_repo = MemoryRepository()
+    populate(Path.cwd() / 'games' / 'adapters' / 'data', test_repo)
+    for game in test_repo.get_all_games():
+        assert test_repo.get_game(game.game_id) is game
+
 
 def test_get_game_by_genre():
     test_repo = MemoryRepository()
@@ -176,6 +190,29 @@ def test_get_game_by_publisher():
     assert len(pub_games) == 0
 
 
+def test_genre_and_publisher_index_follow_game_changes():
+    test_repo = MemoryRepository()
+    game1 = Game(127, "Neo Culture Technology")
+    game2 = Game(4, "The Sims 4")
+    game1.add_genre(Genre("Action"))
+    game1.publisher = Publisher("SM Entertainment")
+    test_repo.add_game(game1)
+    test_repo.add_game(game2)
+    assert test_repo.get_game_by_genre(Genre("Action")) == [game1]
+    assert test_repo.get_game_by_publisher(Publisher("SM Entertainment")) == [game1]
+
+    # genres added after the game is in the repo are indexed, and results stay sorted by id
+    game2.add_genre(Genre("Action"))
+    assert test_repo.get_game_by_genre(Genre("Action")) == [game2, game1]
+
+    # removed genres and replaced publishers are dropped from the index
+    game1.remove_genre(Genre("Action"))
+    game1.publisher = Publisher("EA Sports")
+    assert test_repo.get_game_by_genre(Genre("Action")) == [game2]
+    assert test_repo.get_game_by_publisher(Publisher("SM Entertainment")) == []
+    assert test_repo.get_game_by_publisher(Publisher("EA Sports")) == [game1]
+
+
 def test_get_all_games():
     # test if there are no games
     test_repo = MemoryRepository()
@@ -280,6 +317,73 @@ def test_sort_games_by_date():
         assert game in test_repo.get_all_games()
 
 
+def test_get_all_games_by_date():
+    test_repo = MemoryRepository()
+    test_path = Path.cwd() / 'games' / 'adapters' / 'data'
+    populate(test_path, test_repo)
+
+    # test that the maintained ordering matches sorting the whole catalogue
+    assert test_repo.get_all_games_by_date() == test_repo.sort_games_by_date(test_repo.get_all_games())
+
+    # test that a date range is a contiguous run of the ordering, newest first
+    games_in_2020 = [game for game in test_repo.get_all_games_by_date() if game.parsed_release_date.year == 2020]
+    assert len(games_in_2020) > 0
+    assert test_repo.get_games_released_between(date(2020, 1, 1), date(2020, 12, 31)) == games_in_2020
+    assert test_repo.get_games_released_between(date(2031, 1, 1), date(2031, 12, 31)) == []
+
+    # test that changing a release date moves the game
+    game = test_repo.get_game(3010)
+    game.release_date = "Jan 1, 2030"
+    assert test_repo.get_all_games_by_date()[0] == game
+    assert test_repo.get_all_games_by_date() == test_repo.sort_games_by_date(test_repo.get_all_games())
+
+
+def test_get_games_page():
+    test_repo = MemoryRepository()
+    test_path = Path.cwd() / 'games' / 'adapters' / 'data'
+    populate(test_path, test_repo)
+    games_by_date = test_repo.sort_games_by_date(test_repo.get_all_games())
+
+    # test that pages are consecutive slices of the date ordered catalogue
+    assert test_repo.get_number_of_games() == 877
+    assert test_repo.get_games_page(0, 16) == games_by_date[0:16]
+    assert test_repo.get_games_page(16, 16) == games_by_date[16:32]
+    assert test_repo.get_games_page(864, 16) == games_by_date[864:]
+    assert test_repo.get_games_page(880, 16) == []
+
+    # test that a keyset page starts right after the cursor game
+    last_game = games_by_date[15]
+    assert test_repo.get_games_after(last_game.parsed_release_date, last_game.game_id, 16) == games_by_date[16:32]
+    last_game = games_by_date[-1]
+    assert test_repo.get_games_after(last_game.parsed_release_date, last_game.game_id, 16) == []
+
+    # test that undated games follow every dated cursor, in id order
+    undated = [Game(game_id, "Undated") for game_id in (2, 1)]
+    for game in undated:
+        test_repo.add_game(game)
+    assert test_repo.get_games_after(last_game.parsed_release_date, last_game.game_id, 16) == undated[::-1]
+    assert test_repo.get_games_after(None, 1, 16) == [undated[0]]
+
+    # test pages filtered by genre and publisher
+    action_games = test_repo.sort_games_by_date(test_repo.get_game_by_genre(Genre("Action")))
+    assert test_repo.get_number_of_games_by_genre(Genre("Action")) == 380
+    assert test_repo.get_games_by_genre_page(Genre("Action"), 16, 16) == action_games[16:32]
+    assert test_repo.get_number_of_games_by_genre(Genre("Card Game")) == 0
+    assert test_repo.get_games_by_genre_page('Action', 0, 16) == []
+    assert test_repo.get_number_of_games_by_publisher(Publisher("Activision")) == 1
+    assert test_repo.get_games_by_publisher_page(Publisher("Activision"), 0, 16) == \
+           [Game(7940, "Call of DutyÂ® 4: Modern WarfareÂ®")]
+    assert test_repo.get_number_of_games_by_publisher(Publisher("EA Sports")) == 0
+
+    # test paged search results
+    ball_games = test_repo.sort_games_by_date(test_repo.search_games_by_title("ball"))
+    assert test_repo.get_number_of_search_results("ball", 'title') == 15
+    assert test_repo.search_games_page("ball", 'title', 0, 10) == ball_games[0:10]
+    assert test_repo.search_games_page("ball", 'title', 10, 10) == ball_games[10:]
+    assert test_repo.get_number_of_search_results("ad", 'genre') == len(test_repo.search_games_by_genre("ad"))
+    assert test_repo.get_number_of_search_results("ball", 'developer') == 0
+
+
 def test_search_games_by_title():
     test_repo = MemoryRepository()
     test_path = Path.cwd() / 'games' / 'adapters' / 'data'
@@ -307,6 +411,27 @@ def test_search_games_by_title():
     assert len(games) == 0
 
 
+def test_search_games_by_title_index():
+    test_repo = MemoryRepository()
+    test_path = Path.cwd() / 'games' / 'adapters' / 'data'
+    populate(test_path, test_repo)
+
+    def scan(search_query):
+        return [game for game in test_repo.get_all_games() if search_query.lower() in game.title.lower()]
+
+    # test that the trigram index finds exactly what a scan of every title does, short queries included
+    for search_query in ["a", "Ba", "ball", "BALL", "the", "Call of Duty", "2: ", "rally", "zzzz"]:
+        assert test_repo.search_games_by_title(search_query) == scan(search_query)
+        assert test_repo.get_number_of_search_results(search_query, 'title') == len(scan(search_query))
+
+    # test that the index follows title changes
+    game = test_repo.get_game(3010)
+    game.title = "Quixotic Quest"
+    assert test_repo.search_games_by_title("xpand rally") == []
+    assert test_repo.search_games_by_title("quixotic") == [game]
+    assert test_repo.search_games_page("quixotic", 'title', 0, 16) == [game]
+
+
 def test_search_games_by_genre():
     test_repo = MemoryRepository()
     test_path = Path.cwd() / 'games' / 'adapters' / 'data'
@@ -429,6 +554,35 @@ def test_add_user():
     assert len(users) == 3
 
 
+def test_get_suggestions():
+    test_repo = MemoryRepository()
+    test_path = Path.cwd() / 'games' / 'adapters' / 'data'
+    populate(test_path, test_repo)
+
+    # test that titles, genres and publishers are matched by prefix, case-insensitively
+    assert test_repo.get_suggestions("ACT", 5) == [Suggestion("Action", 'genre'), Suggestion("Activision", 'publisher')]
+    assert test_repo.get_suggestions("xp", 2) == [Suggestion("Xpand Rally", 'title', 3010),
+                                                  Suggestion("Xploquest 2", 'title', 791370)]
+    assert test_repo.get_suggestions("zzzz", 5) == []
+
+    # test that the most reviewed come first, and that new reviews are counted
+    assert test_repo.get_suggestions("d", 1) == [Suggestion("Deer Journey", 'title', 1995240)]
+    game = test_repo.get_game(3010)
+    for i in range(20):
+        user = User(f"reviewer{i}", "Passw0rd")
+        test_repo.add_user(user)
+        test_repo.add_review(Review(user, game, 5, "Great", str(datetime.now())))
+    assert test_repo.get_suggestions("x", 1) == [Suggestion("Xpand Rally", 'title', 3010)]
+    # its genre and publisher gain the reviews too
+    assert test_repo.get_suggestions("r", 1) == [Suggestion("Racing", 'genre')]
+    assert test_repo.get_suggestions("t", 1) == [Suggestion("Techland", 'publisher')]
+
+    # test that retitled games are suggested under their new title
+    game.title = "Quixotic Quest"
+    assert test_repo.get_suggestions("xpand", 5) == []
+    assert test_repo.get_suggestions("quix", 5) == [Suggestion("Quixotic Quest", 'title', 3010)]
+
+
 def test_get_user():
     # get a user that exists in the repo
     test_repo = MemoryRepository()
@@ -446,6 +600,10 @@ def test_get_user():
     test_user = test_repo.get_user("user03")
     assert test_user is None
 
+    # test that the lookup ignores case
+    test_user = test_repo.get_user("USER01")
+    assert test_user is user1
+
 
 def test_get_all_users():
     # test if there are no users
@@ -472,3 +630,34 @@ def test_get_all_users():
     users = test_repo.get_all_users()
     assert len(users) == 3
     assert user4 not in users
+
+
+def test_lazy_descriptions():
+    test_path = Path.cwd() / 'tests' / 'data'
+    test_repo = MemoryRepository()
+    populate(test_path, test_repo)
+    descriptions = DescriptionStore(cache_size=2)
+    lazy_repo = MemoryRepository(descriptions)
+    populate(test_path, lazy_repo)
+
+    # test that descriptions read back from the store match the ones kept in memory
+    for game in test_repo.get_all_games():
+        lazy_game = lazy_repo.get_game(game.game_id)
+        assert lazy_game.description == game.description
+        assert (game.description is None) == (lazy_game._Game__description_loader is None)
+        assert lazy_game._Game__description is None
+    assert descriptions.size > 0
+
+    # test that the most recent descriptions are cached
+    game = lazy_repo.get_all_games()[0]
+    game.description
+    game.description
+    assert descriptions.cache_info().hits >= 1
+
+    # test that a new description replaces the stored one, and that pickling keeps the text
+    lazy_game = lazy_repo.get_all_games()[1]
+    description = lazy_game.description
+    assert pickle.loads(pickle.dumps(lazy_game)).description == description
+    lazy_game.description = "A new description"
+    assert lazy_game.description == "A new description"
+    descriptions.close()
@@ -8,7 +8,8 @@ import pytest
 
 from games.adapters.memory_repository import MemoryRepository
 from games.adapters.repository_populate import populate
-from games.allgames.services import get_all_games, pagination
+from games.allgames.services import get_all_games, pagination, get_games_page, get_number_of_games, make_cursor, \
+    parse_cursor, get_games_after_cursor
 from games.authentication.services import user_to_dict, add_user, NameNotUniqueException, is_username_taken, get_user, \
     UnknownUserException, authenticate_user, AuthenticationException
 from games.domainmodel.model import Game, Publisher, Genre, Review, User
@@ -17,7 +18,9 @@ from games.info.services import get_recommended_games, get_game_by_id
 from games.profile.services import add_game_to_favourites, remove_game_from_favourites, get_favourite_games, get_reviews
 from games.reviews.services import add_new_review
 from games.sidebar.services import search_by_title, search_by_genre, search_by_publisher, get_genres_and_urls, \
-    get_publishers_and_urls, game_by_genre, game_by_publisher
+    get_publishers_and_urls, game_by_genre, game_by_publisher, search_page, get_number_of_search_results, \
+    game_by_genre_page, get_number_of_games_by_genre, game_by_publisher_page, get_number_of_games_by_publisher, \
+    sidebar_cache, get_sidebar_cache_stats, get_sidebar_fragment
 
 
 @pytest.fixture
@@ -61,6 +64,39 @@ def test_pagination(test_repo):
     assert visible_games == all_games[(16 * (last_page - 1)):]
 
 
+def test_get_games_page(test_repo):
+    # test that paging through the repository matches paginating the full list
+    all_games = get_all_games(test_repo)
+    assert get_number_of_games(test_repo) == len(all_games)
+    assert get_games_page(test_repo, 16, 1) == pagination(16, 1, all_games)
+    assert get_games_page(test_repo, 16, 2) == pagination(16, 2, all_games)
+
+    last_page = int(len(all_games) / 16) + 1
+    assert get_games_page(test_repo, 16, last_page) == pagination(16, last_page, all_games)
+
+
+def test_cursor_pages_with_undated_games():
+    # test that cursors walk past the dated games into the undated ones, which come last
+    repo = MemoryRepository()
+    for game_id in range(1, 21):
+        game = Game(game_id, f"Game {game_id}")
+        if game_id <= 10:
+            game.release_date = f"Oct {game_id}, 2008"
+        repo.add_game(game)
+    all_games = get_all_games(repo)
+    assert make_cursor(all_games[-1]) == "none_20"
+    assert parse_cursor("none_20") == (None, 20)
+
+    visible_games, cursor = [], ""
+    while True:
+        page = get_games_after_cursor(repo, 6, cursor)
+        visible_games += page
+        if len(page) < 6:
+            break
+        cursor = make_cursor(page[-1])
+    assert visible_games == all_games
+
+
 # home service
 def test_get_recently_added_games(test_repo):
     # test that the correct number and type of objects are returned
@@ -262,6 +298,67 @@ def test_get_publishers_and_urls(test_repo):
            "http://127.0.0.1:5000/games_by_publisher?publisher=13-lab%2Cazimuth%20team"
 
 
+def test_sidebar_cache(test_repo):
+    sidebar_cache.clear()
+
+    # test that the urls are built once and then served from the cache
+    genre_urls = get_genres_and_urls(test_repo)
+    publisher_urls = get_publishers_and_urls(test_repo)
+    assert get_genres_and_urls(test_repo) is genre_urls
+    assert get_publishers_and_urls(test_repo) is publisher_urls
+    stats = get_sidebar_cache_stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 3
+
+    # test that adding a genre or publisher rebuilds the urls
+    test_repo.add_genre(Genre("Card Game"))
+    assert "Card Game" in get_genres_and_urls(test_repo)
+    test_repo.add_publisher(Publisher("Neo Culture Technology"))
+    assert "Neo Culture Technology" in get_publishers_and_urls(test_repo)
+    assert get_sidebar_cache_stats()['misses'] == 3
+
+    # test that another repository never receives cached urls
+    other_repo = MemoryRepository()
+    assert get_genres_and_urls(other_repo) == {}
+
+
+def test_sidebar_fragment_cache(test_repo):
+    sidebar_cache.clear()
+    renders = []
+
+    def render(genre_urls, publisher_urls):
+        renders.append(len(genre_urls))
+        return f"{len(genre_urls)} genres, {len(publisher_urls)} publishers"
+
+    # test that the fragment is rendered once and then reused
+    assert get_sidebar_fragment(test_repo, render) == "24 genres, 798 publishers"
+    assert get_sidebar_fragment(test_repo, render) == "24 genres, 798 publishers"
+    assert renders == [24]
+    assert get_sidebar_cache_stats()['fragment_hits'] == 1
+
+    # test that a new genre invalidates the rendered fragment
+    test_repo.add_genre(Genre("Card Game"))
+    assert get_sidebar_fragment(test_repo, render) == "25 genres, 798 publishers"
+    assert renders == [24, 25]
+
+
+def test_sidebar_fragment_rendered_against_an_old_version(test_repo):
+    sidebar_cache.clear()
+
+    def render(genre_urls, publisher_urls):
+        return f"{len(genre_urls)} genres"
+
+    def slow_render(genre_urls, publisher_urls):
+        # another request changes the catalogue and renders the new sidebar before this render finishes
+        test_repo.add_genre(Genre("Card Game"))
+        assert get_sidebar_fragment(test_repo, render) == "25 genres"
+        return render(genre_urls, publisher_urls)
+
+    # test that the late render of the old version is not served afterwards
+    assert get_sidebar_fragment(test_repo, slow_render) == "24 genres"
+    assert get_sidebar_fragment(test_repo, render) == "25 genres"
+
+
 def test_game_by_genre(test_repo):
     # test that the correct number of games are returned for a given genre
     # test that all objects returned are of Game type
@@ -278,6 +375,23 @@ def test_game_by_publisher(test_repo):
     assert all(isinstance(game, Game) for game in games)
 
 
+def test_paged_sidebar_services(test_repo):
+    # test that paged searches match the unpaged services
+    games = search_by_title(test_repo, "ball")
+    assert get_number_of_search_results(test_repo, "  ball ", 'title') == len(games)
+    assert search_page(test_repo, "ball", 'title', 10, 2) == pagination(10, 2, games)
+    assert get_number_of_search_results(test_repo, "   ", 'title') == 0
+    assert search_page(test_repo, "   ", 'title', 10, 1) == []
+
+    games = game_by_genre(test_repo, "Action")
+    assert get_number_of_games_by_genre(test_repo, "Action") == len(games)
+    assert game_by_genre_page(test_repo, "Action", 16, 3) == pagination(16, 3, games)
+
+    games = game_by_publisher(test_repo, "Activision")
+    assert get_number_of_games_by_publisher(test_repo, "Activision") == len(games)
+    assert game_by_publisher_page(test_repo, "Activision", 16, 1) == games
+
+
 # authentication service
 def test_add_user(test_repo):
     # test that a new user can be added to the repo
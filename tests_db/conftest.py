@@ -3,6 +3,7 @@ import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, clear_mappers
 
+from games import create_app
 from games.adapters import database_repository, repository_populate
 from games.adapters.orm import metadata, map_model_to_tables
 
@@ -58,3 +59,19 @@ def empty_session():
     session_factory = sessionmaker(bind=engine)
     yield session_factory()
     metadata.drop_all(engine)
+
+
+@pytest.fixture
+def database_client():
+    my_app = create_app({
+        'TESTING': 'True',
+        'REPOSITORY': 'database',
+        'SQLALCHEMY_DATABASE_URI': TEST_DATABASE_URI_FILE,
+        'SQLALCHEMY_ECHO': False,
+        'SQLALCHEMY_RECORD_QUERIES': True,
+        'TEST_DATA_PATH': TEST_DATA_PATH_DATABASE_LIMITED,
+        'WTF_CSRF_ENABLED': False
+    })
+    yield my_app.test_client()
+    metadata.drop_all(create_engine(TEST_DATABASE_URI_FILE))
+    clear_mappers()
@@ -1,11 +1,17 @@
 from collections import Counter
-from datetime import datetime
+from datetime import date, datetime
 import random
 import uuid
 
 import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.pool import NullPool, QueuePool, SingletonThreadPool
 
+from games import engine_options, sqlite_pragmas
+import games.adapters.repository as repo
 from games.adapters.database_repository import SqlAlchemyRepository
+from games.adapters.suggestion_index import Suggestion
+from games.adapters.orm import create_full_text_search, create_missing_indexes, metadata, migrate_schema
 from games.domainmodel.model import Game, Genre, Publisher, User, Review
 
 
@@ -75,6 +81,73 @@ def test_add_genre(session_factory):
     assert len(genres) == 25
 
 
+def test_bulk_add(session_factory):
+    test_repo = SqlAlchemyRepository(session_factory)
+    version = test_repo.get_catalogue_version()
+
+    # add new games together with their genres and publisher
+    game1 = Game(127, "Neo Culture Technology")
+    game1.release_date = "Oct 21, 2008"
+    game1.publisher = Publisher("SM Entertainment")
+    game1.add_genre(Genre("Card Game"))
+    game1.add_genre(Genre("Action"))
+    game2 = Game(7940, "Call of DutyÂ® 4: Modern WarfareÂ®")
+    test_repo.bulk_add([game1, game2, 'game'], [Genre("Card Game"), Genre("Action")],
+                       [Publisher("SM Entertainment")])
+
+    # test that only the new rows are inserted
+    assert len(test_repo.get_all_games()) == 878
+    assert len(test_repo.get_all_genres()) == 25
+    assert len(test_repo.get_all_publishers()) == 799
+    assert test_repo.get_catalogue_version() != version
+
+    # test that the new game is stored with its relationships
+    game = test_repo.get_game(127)
+    assert game.release_date == "Oct 21, 2008"
+    assert game.publisher == Publisher("SM Entertainment")
+    assert sorted(game.genres) == [Genre("Action"), Genre("Card Game")]
+    assert game in test_repo.get_game_by_genre(Genre("Card Game"))
+
+    # test that loading the same games again changes nothing
+    test_repo.bulk_add([game1], [Genre("Card Game")], [Publisher("SM Entertainment")])
+    assert len(test_repo.get_all_games()) == 878
+    assert len(test_repo.get_game_by_genre(Genre("Card Game"))) == 1
+
+
+def test_bulk_add_batches(session_factory):
+    test_repo = SqlAlchemyRepository(session_factory)
+    engine = session_factory.kw['bind']
+    selects = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT'):
+            selects.append(statement)
+
+    # batches repeating a game, a genre and a publisher from earlier batches and from the database
+    batches = []
+    for game_id in range(1, 6):
+        game = Game(game_id, f"Game {game_id}")
+        game.publisher = Publisher("SM Entertainment")
+        game.add_genre(Genre("Card Game"))
+        game.add_genre(Genre("Action"))
+        batches.append(([game, Game(1, "Game 1"), Game(7940, "Duplicate")], [Genre("Card Game"), Genre("Action")],
+                        [Publisher("SM Entertainment")]))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        test_repo.bulk_add_batches(iter(batches))
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    # test that the existing keys are read once for all the batches, and each new row is inserted once
+    assert len(selects) == 3
+    assert len(test_repo.get_all_games()) == 882
+    assert len(test_repo.get_all_genres()) == 25
+    assert len(test_repo.get_all_publishers()) == 799
+    assert test_repo.get_game(7940).title != "Duplicate"
+    assert len(test_repo.get_game_by_genre(Genre("Card Game"))) == 5
+
+
 def test_add_user(session_factory):
     test_repo = SqlAlchemyRepository(session_factory)
 
@@ -257,6 +330,67 @@ def test_sort_games_by_date(session_factory):
         assert game in test_repo.get_all_games()
 
 
+def test_description_is_loaded_on_access(session_factory):
+    test_repo = SqlAlchemyRepository(session_factory)
+
+    # test that listing pages leave the description column out, and that the info page still gets it
+    games = test_repo.get_games_page(0, 16)
+    assert all('_Game__description' in inspect(game).unloaded for game in games)
+    game = test_repo.get_game(7940)
+    assert game.description.startswith("The new action-thriller from the award-winning team at Infinity Ward")
+    assert '_Game__description' not in inspect(game).unloaded
+
+
+def test_get_games_page(session_factory):
+    test_repo = SqlAlchemyRepository(session_factory)
+
+    def by_date(games):
+        return sorted(games, key=lambda game: (-game.parsed_release_date.toordinal(), game.game_id))
+
+    # test that pages ordered in SQL match sorting the whole catalogue in Python
+    games_by_date = by_date(test_repo.get_all_games())
+    assert test_repo.get_number_of_games() == 877
+    assert test_repo.get_games_page(0, 16) == games_by_date[0:16]
+    assert test_repo.get_games_page(16, 16) == games_by_date[16:32]
+    assert test_repo.get_games_page(864, 16) == games_by_date[864:]
+
+    # test that a keyset page starts right after the cursor game
+    last_game = games_by_date[15]
+    assert test_repo.get_games_after(last_game.parsed_release_date, last_game.game_id, 16) == games_by_date[16:32]
+    last_game = games_by_date[-1]
+    assert test_repo.get_games_after(last_game.parsed_release_date, last_game.game_id, 16) == []
+
+    # test date ordering and date ranges done in SQL
+    assert test_repo.get_all_games_by_date() == games_by_date
+    games_in_2020 = [game for game in games_by_date if game.parsed_release_date.year == 2020]
+    assert len(games_in_2020) > 0
+    assert test_repo.get_games_released_between(date(2020, 1, 1), date(2020, 12, 31)) == games_in_2020
+
+    # test that undated games sort last, and that keyset pages reach them and walk them in id order
+    undated = [Game(game_id, "Undated") for game_id in (2, 1)]
+    for game in undated:
+        test_repo.add_game(game)
+    assert test_repo.get_all_games_by_date() == games_by_date + undated[::-1]
+    assert test_repo.get_games_after(last_game.parsed_release_date, last_game.game_id, 16) == undated[::-1]
+    assert test_repo.get_games_after(None, 1, 16) == [undated[0]]
+
+    # test pages filtered by genre and publisher
+    action_games = by_date(test_repo.get_game_by_genre(Genre("Action")))
+    assert test_repo.get_number_of_games_by_genre(Genre("Action")) == len(action_games)
+    assert test_repo.get_games_by_genre_page(Genre("Action"), 16, 16) == action_games[16:32]
+    assert test_repo.get_games_by_genre_page('Action', 0, 16) == []
+    assert test_repo.get_number_of_games_by_publisher(Publisher("Activision")) == 1
+    assert test_repo.get_games_by_publisher_page(Publisher("Activision"), 0, 16) == \
+           [Game(7940, "Call of DutyÂ® 4: Modern WarfareÂ®")]
+
+    # test paged search results
+    ball_games = by_date(test_repo.search_games_by_title("ball"))
+    assert test_repo.get_number_of_search_results("ball", 'title') == len(ball_games)
+    assert test_repo.search_games_page("ball", 'title', 10, 10) == ball_games[10:20]
+    assert test_repo.get_number_of_search_results("ad", 'genre') == len(test_repo.search_games_by_genre("ad"))
+    assert test_repo.get_number_of_search_results("ball", 'developer') == 0
+
+
 def test_search_games_by_title(session_factory):
     test_repo = SqlAlchemyRepository(session_factory)
 
@@ -384,3 +518,288 @@ def test_update_user(session_factory):
     test_user = test_repo.get_user("arianagrande")
     assert len(test_user.favourite_games) == 0
     assert game not in test_user.favourite_games
+
+
+def test_all_games_statement_count_is_bounded(database_client):
+    # warm the sidebar cache so that every measured request does the same work
+    database_client.get('/all_games')
+
+    full_page = database_client.get('/all_games')
+    last_page = database_client.get('/all_games/2')
+    assert full_page.status_code == 200 and last_page.status_code == 200
+
+    # 16 games on the first page, 3 on the second: eager loading keeps the count independent of page size
+    full_page_count = int(full_page.headers['X-SQL-Statement-Count'])
+    last_page_count = int(last_page.headers['X-SQL-Statement-Count'])
+    assert full_page_count == last_page_count
+    assert full_page_count <= 5
+
+
+def test_game_detail_loaders(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    game = repo.get_game(7940)
+    # the detail page's relationships are loaded with the game rather than one query at a time
+    unloaded = inspect(game).unloaded
+    for attribute in ('_Game__publisher', '_Game__genres', '_Game__reviews', '_Game__recommended_games'):
+        assert attribute not in unloaded
+
+    # strategies can be overridden per kind of query
+    lazy_repo = SqlAlchemyRepository(session_factory, {'detail': {}})
+    assert '_Game__genres' in inspect(lazy_repo.get_game(7940)).unloaded
+
+
+def test_search_ranks_full_text_matches(database_client):
+    # the closer match comes first on the search page, although the other game was released later
+    response = database_client.get('/search/?filter=title&query=shadow')
+    assert response.status_code == 200
+    assert response.data.count(b'<div class="game">') == 2
+    assert response.data.index(b'Shadow Dancer') < response.data.index(b'EARTH DEFENSE FORCE 4.1 The Shadow')
+
+
+def test_session_registry_is_reused_across_requests(database_client):
+    session = repo.repo_instance._session_cm.session
+    database_client.get('/all_games')
+    database_client.get('/all_games/2')
+    assert repo.repo_instance._session_cm.session is session
+
+    # the requests' connections were returned to the pool rather than closed
+    pool = repo.repo_instance._session_cm.session.get_bind().pool
+    assert isinstance(pool, QueuePool)
+    assert pool.checkedout() == 0
+
+
+def test_engine_options():
+    options = engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:///games.db', 'SQLALCHEMY_POOL_CLASS': 'QueuePool',
+                              'SQLALCHEMY_POOL_SIZE': 3, 'SQLALCHEMY_MAX_OVERFLOW': 2})
+    assert options['poolclass'] is QueuePool
+    assert options['pool_size'] == 3 and options['max_overflow'] == 2
+
+    options = engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'SQLALCHEMY_POOL_CLASS': 'QueuePool'})
+    assert options['poolclass'] is SingletonThreadPool
+
+    options = engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:///games.db', 'SQLALCHEMY_POOL_CLASS': 'NullPool'})
+    assert options['poolclass'] is NullPool and 'pool_size' not in options
+
+
+def test_sqlite_pragmas(database_client):
+    engine = repo.repo_instance._session_cm.session.get_bind()
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == 'wal'
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert connection.exec_driver_sql("PRAGMA cache_size").scalar() == -64000
+        assert connection.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+
+def test_sqlite_pragmas_from_config():
+    assert sqlite_pragmas({'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': None}) == {'journal_mode': 'DELETE'}
+
+
+def query_plans(session_factory, call) -> list:
+    # runs EXPLAIN QUERY PLAN on each query issued by call
+    engine = session_factory.kw['bind']
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        call()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    with engine.connect() as connection:
+        return [' | '.join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}",
+                                                                          parameters))
+                for statement, parameters in statements]
+
+
+def test_hot_queries_use_indexes(session_factory):
+    test_repo = SqlAlchemyRepository(session_factory)
+
+    plans = query_plans(session_factory, lambda: test_repo.get_games_page(32, 16))
+    assert 'USING INDEX ix_games_release_date' in plans[0]
+    assert 'TEMP B-TREE' not in plans[0]
+
+    plans = query_plans(session_factory, lambda: test_repo.get_games_after(date(2015, 1, 1), 5, 16))
+    assert 'SEARCH games USING INDEX ix_games_release_date (release_date<?)' in plans[0]
+    assert 'TEMP B-TREE' not in plans[0]
+
+    plans = query_plans(session_factory, lambda: test_repo.get_games_by_publisher_page(Publisher("Activision"), 0, 16))
+    assert 'USING INDEX ix_games_publisher_name_release_date (publisher_name=?)' in plans[0]
+    assert 'TEMP B-TREE' not in plans[0]
+
+    plans = query_plans(session_factory, lambda: test_repo.get_games_by_genre_page(Genre("Action"), 0, 16))
+    assert 'USING COVERING INDEX ix_game_genres_genre_name_game_id (genre_name=?)' in plans[0]
+
+    plans = query_plans(session_factory, lambda: test_repo.get_game(7940))
+    assert any('USING INDEX ix_game_genres_game_id' in plan for plan in plans)
+    assert any('USING INDEX ix_reviews_game_id' in plan for plan in plans)
+
+
+def test_existence_checks_use_keyed_exists(session_factory):
+    test_repo = SqlAlchemyRepository(session_factory)
+    test_repo.add_user(User("existing", "Passw0rd123"))
+
+    # test that adding a row that is already stored runs one EXISTS query that searches by its key,
+    # rather than loading the table
+    for call, search in ((lambda: test_repo.add_game(Game(7940, "Duplicate")),
+                          'SEARCH games USING INTEGER PRIMARY KEY (rowid=?)'),
+                         (lambda: test_repo.add_genre(Genre("Action")),
+                          'SEARCH genres USING COVERING INDEX sqlite_autoindex_genres_1 (genre_name=?)'),
+                         (lambda: test_repo.add_publisher(Publisher("Activision")),
+                          'SEARCH publishers USING COVERING INDEX sqlite_autoindex_publishers_1 (name=?)'),
+                         (lambda: test_repo.add_user(User("existing", "Passw0rd123")),
+                          'SEARCH users USING INDEX sqlite_autoindex_users_1 (user_name=?)')):
+        plans = query_plans(session_factory, call)
+        assert len(plans) == 1
+        assert 'SCALAR SUBQUERY' in plans[0]
+        assert search in plans[0]
+
+
+def test_create_missing_indexes(session_factory):
+    engine = session_factory.kw['bind']
+    # a database file from before the indexes were declared
+    for index in ('ix_game_genres_genre_name_game_id', 'ix_reviews_user_name', 'ix_games_release_date'):
+        engine.execute(f"DROP INDEX {index}")
+
+    create_missing_indexes(engine)
+    create_missing_indexes(engine)
+
+    index_names = {row[0] for row in engine.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            assert index.name in index_names
+
+
+def test_release_date_column(session_factory):
+    test_repo = SqlAlchemyRepository(session_factory)
+
+    # stored as a DATE, with the display string rebuilt from it
+    rows = list(session_factory().execute("SELECT release_date FROM games WHERE game_id = 7940"))
+    assert rows == [("2007-11-12",)]
+    game = test_repo.get_game(7940)
+    assert game.parsed_release_date == date(2007, 11, 12)
+    assert game.release_date == "Nov 12, 2007"
+
+
+def test_migrate_legacy_release_dates(session_factory):
+    engine = session_factory.kw['bind']
+    # a database file from when release dates were stored as display text
+    engine.execute("UPDATE games SET release_date = 'Nov 12, 2007' WHERE game_id = 7940")
+    engine.execute("UPDATE games SET release_date = 'Jul 1, 2020' WHERE game_id = 3010")
+    engine.execute("CREATE INDEX ix_games_release_date_order ON games (substr(release_date, -4))")
+
+    migrate_schema(engine)
+
+    rows = {game_id: release_date for game_id, release_date in
+            engine.execute("SELECT game_id, release_date FROM games WHERE game_id IN (7940, 3010)")}
+    assert rows == {7940: "2007-11-12", 3010: "2020-07-01"}
+    index_names = {row[0] for row in engine.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert 'ix_games_release_date_order' not in index_names
+
+
+def test_catalogue_version_is_kept_in_the_database(session_factory):
+    engine = session_factory.kw['bind']
+    test_repo = SqlAlchemyRepository(session_factory)
+    version = test_repo.get_catalogue_version()
+
+    # another repository, as in another worker process, adds a genre
+    SqlAlchemyRepository(session_factory).add_genre(Genre("Card Game"))
+    assert test_repo.get_catalogue_version() > version
+    version = test_repo.get_catalogue_version()
+
+    # so does a write that bypasses the repositories
+    engine.execute("DELETE FROM publishers WHERE name = 'Activision'")
+    assert test_repo.get_catalogue_version() > version
+
+    # a database file from before the counters gets them
+    engine.execute("DROP TRIGGER genres_and_publishers_genres_insert")
+    engine.execute("DROP TABLE version_counters")
+    migrate_schema(engine)
+    assert test_repo.get_catalogue_version() == 0
+    test_repo.add_genre(Genre("Board Game"))
+    assert test_repo.get_catalogue_version() == 1
+
+
+def test_full_text_search(session_factory):
+    engine = session_factory.kw['bind']
+    ilike_repo = SqlAlchemyRepository(session_factory)
+    ilike_results = {
+        (search_query, filter_criteria): set(ilike_repo.search_games_page(search_query, filter_criteria, 0, 1000))
+        for search_query, filter_criteria in [("ball", 'title'), ("BALL", 'title'), ("Call of", 'title'),
+                                              ("adv", 'genre'), ("Action", 'genre'), ("ad", 'genre'),
+                                              ("activision", 'publisher'), ("games", 'publisher')]}
+
+    with engine.begin() as connection:
+        assert create_full_text_search(connection)
+    test_repo = SqlAlchemyRepository(session_factory)
+
+    # test that the index finds the same games as ILIKE, with 2 character queries still using ILIKE
+    for (search_query, filter_criteria), games in ilike_results.items():
+        assert set(test_repo.search_games_page(search_query, filter_criteria, 0, 1000)) == games
+        assert test_repo.get_number_of_search_results(search_query, filter_criteria) == len(games)
+    assert set(test_repo.search_games_by_title("ball")) == ilike_results[("ball", 'title')]
+
+    plans = query_plans(session_factory, lambda: test_repo.search_games_by_title("ball"))
+    assert 'VIRTUAL TABLE INDEX' in plans[0]
+
+    # test that the triggers keep the index up to date
+    game = Game(1, "Zyzzyx Quest")
+    game.publisher = Publisher("Activision")
+    game.add_genre(Genre("Action"))
+    test_repo.add_game(game)
+    assert test_repo.search_games_by_title("zyzzyx") == [game]
+    assert game in test_repo.search_games_by_genre("action")
+
+    game = test_repo.get_game(1)
+    game.title = "Quixotic Quest"
+    test_repo.update_game(game)
+    assert test_repo.search_games_by_title("zyzzyx") == []
+    assert test_repo.search_games_by_title("quixotic") == [game]
+
+
+def test_get_suggestions(session_factory):
+    test_repo = SqlAlchemyRepository(session_factory)
+
+    # test that the index built from the database matches by prefix
+    assert test_repo.get_suggestions("ACT", 5) == [Suggestion("Action", 'genre'), Suggestion("Activision", 'publisher')]
+    assert test_repo.get_suggestions("xp", 1) == [Suggestion("Xpand Rally", 'title', 3010)]
+
+    # test that reviews and new games update it
+    test_repo.add_user(User("reviewer", "Passw0rd"))
+    user = test_repo.get_user("reviewer")
+    game = test_repo.get_game(3010)
+    test_repo.add_review(Review(user, game, 5, "Great", str(datetime.now())))
+    assert test_repo.get_suggestions("t", 1) == [Suggestion("Techland", 'publisher')]
+
+    test_repo.add_game(Game(1, "Xylophone Hero"))
+    assert test_repo.get_suggestions("xyl", 10) == [Suggestion("Xylophone Hero", 'title', 1)]
+
+    # test that a fresh repository counts the stored reviews
+    test_repo = SqlAlchemyRepository(session_factory)
+    assert test_repo.get_suggestions("x", 1) == [Suggestion("Xpand Rally", 'title', 3010)]
+    assert test_repo.get_suggestions("t", 1) == [Suggestion("Techland", 'publisher')]
+
+
+def test_suggestions_follow_other_writers(session_factory):
+    engine = session_factory.kw['bind']
+    test_repo = SqlAlchemyRepository(session_factory)
+    assert test_repo.get_suggestions("xp", 1) == [Suggestion("Xpand Rally", 'title', 3010)]
+
+    # test that its own writes update the index in place, leaving lookups to read only the counter
+    test_repo.add_game(Game(1, "Xylophone Hero"))
+    assert len(query_plans(session_factory, lambda: test_repo.get_suggestions("xyl", 10))) == 1
+    assert test_repo.get_suggestions("xyl", 10) == [Suggestion("Xylophone Hero", 'title', 1)]
+
+    # test that a game added by another repository, as in another worker process, rebuilds it
+    SqlAlchemyRepository(session_factory).add_game(Game(2, "Xenon Racer"))
+    assert test_repo.get_suggestions("xe", 10) == [Suggestion("Xenon Racer", 'title', 2)]
+
+    # test that so does a write that bypasses the repositories
+    engine.execute("UPDATE games SET game_title = 'Zither Hero' WHERE game_id = 1")
+    assert test_repo.get_suggestions("xyl", 10) == []
+    assert test_repo.get_suggestions("zither", 10) == [Suggestion("Zither Hero", 'title', 1)]
+    assert len(query_plans(session_factory, lambda: test_repo.get_suggestions("zither", 10))) == 1
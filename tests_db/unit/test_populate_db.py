@@ -6,7 +6,7 @@ def testing_db_inspect_table_names(database_engine):
     inspecting = inspect(database_engine)
     print(inspecting.get_table_names())
     assert inspecting.get_table_names() == ['favourites', 'game_genres', 'games', 'genres', 'publishers',
-                                            'recommended_games', 'reviews', 'users']
+                                            'recommended_games', 'reviews', 'users', 'version_counters']
 
 
 def test_database_populates_all_favourites(database_engine):